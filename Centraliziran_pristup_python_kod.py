@@ -1,5 +1,5 @@
 import pygame
-from queue import PriorityQueue
+from open_list import BucketQueue
 
 # Define Player class
 class Player:
@@ -29,15 +29,15 @@ def heuristic(pos1, pos2):
     return abs(x1 - x2) + abs(y1 - y2)
 
 # A* algorithm implementation
-def find_path(start, end, walls, doors):
-    open_set = PriorityQueue()
-    open_set.put((0, start))
+def find_path(start, end, walls, doors, open_list=BucketQueue, estimate=heuristic):
+    open_set = open_list()
+    open_set.push(start, estimate(start, end), 0)
     came_from = {}
     g_score = {start: 0}
-    f_score = {start: heuristic(start, end)}
+    f_score = {start: estimate(start, end)}
 
-    while not open_set.empty():
-        _, current = open_set.get()
+    while open_set:
+        _, current = open_set.pop()
 
         if current == end:
             path = []
@@ -56,8 +56,8 @@ def find_path(start, end, walls, doors):
             if next_pos not in g_score or tentative_g_score < g_score[next_pos]:
                 came_from[next_pos] = current
                 g_score[next_pos] = tentative_g_score
-                f_score[next_pos] = g_score[next_pos] + heuristic(next_pos, end)
-                open_set.put((f_score[next_pos], next_pos))
+                f_score[next_pos] = g_score[next_pos] + estimate(next_pos, end)
+                open_set.push(next_pos, f_score[next_pos], tentative_g_score)
     return []
 
 # Function to find best path considering the door opening
@@ -1,6 +1,7 @@
 import pygame
 from collections import deque
-import heapq
+from open_list import BucketQueue
+from trajectory import TrajectoryRecorder
 
 # Initialize pygame
 pygame.init()
@@ -50,15 +51,17 @@ class Player:
                 visited.add(next_pos)
         return []
 
-    def a_star(self, start, goal, walls, doors):
-        open_set = []
-        heapq.heappush(open_set, (0, start))
+    def a_star(self, start, goal, walls, doors, open_list=BucketQueue, estimate=None):
+        if estimate is None:
+            estimate = heuristic
+        open_set = open_list()
+        open_set.push(start, estimate(start, goal), 0)
         came_from = {}
         g_score = {start: 0}
-        f_score = {start: heuristic(start, goal)}
+        f_score = {start: estimate(start, goal)}
         
         while open_set:
-            _, current = heapq.heappop(open_set)
+            _, current = open_set.pop()
             
             if current == goal:
                 path = []
@@ -77,8 +80,8 @@ class Player:
                 if tentative_g_score < g_score.get(neighbor, float('inf')):
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                    f_score[neighbor] = tentative_g_score + estimate(neighbor, goal)
+                    open_set.push(neighbor, f_score[neighbor], tentative_g_score)
         
         return []
 
@@ -109,7 +112,7 @@ class Player:
                     segment_path = self.a_star(combined_path[i], combined_path[i + 1], walls, simulated_doors)
                     local_path.extend(segment_path)
                 self.path = local_path
-                print(f"Planned path for agent from {current_pos} via key to {self.end_pos}: {self.path}")
+                recorder.record_plan(self, self.path)
                 return
 
         local_path = []
@@ -117,7 +120,7 @@ class Player:
             segment_path = self.a_star(path_to_end[i], path_to_end[i + 1], walls, doors)
             local_path.extend(segment_path)
         self.path = local_path
-        print(f"Planned path for agent from {current_pos} to {self.end_pos}: {self.path}")
+        recorder.record_plan(self, self.path)
 
 # Define heuristic for A* algorithm
 def heuristic(a, b):
@@ -175,6 +178,9 @@ for row in level:
     y += 18
     x = 0
 
+# Record positions, plans and door events for replay.py
+recorder = TrajectoryRecorder("decentralized.trj", level)
+
 # Set initial positions for yellow and blue squares
 yellow_player = Player((255, 200, 0), (start_pos_yellow[0] * 18, start_pos_yellow[1] * 18), walls, doors)
 blue_player = Player((0, 0, 255), (start_pos_blue[0] * 18, start_pos_blue[1] * 18), walls, doors)
@@ -221,6 +227,7 @@ while running:
             for door_pos in doors:
                 doors[door_pos] = True
                 walls.discard(door_pos)
+                recorder.record_door(door_pos, True)
             for agent in agents:
                 agent.plan_path()
             door_opened = True
@@ -229,6 +236,8 @@ while running:
             next_pos = agent.path.pop(0)
             agent.set_position(next_pos[0] * 18, next_pos[1] * 18)
 
+    recorder.record_tick(agents)
     render_game()
 
+recorder.close()
 pygame.quit()
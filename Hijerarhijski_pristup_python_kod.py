@@ -1,7 +1,17 @@
+import sys
 import pygame
-from collections import deque
-import heapq
 import random
+import numpy as np
+from wavefront import passable_grid, label_components
+from open_list import BucketQueue
+from keys_doors import KeyDoorPlanner
+from landmarks import LandmarkTable
+from lifelong import TaskStream, random_goals
+from assignment import assign_goals
+from conflicts import ConflictMonitor, REPLAN
+from trajectory import TrajectoryRecorder
+from sharding import ShardedWorld
+from hierarchy_cache import CACHE_DIR, map_key, cache_path, hierarchy_arrays, save_hierarchy, load_hierarchy, LazyClusterCache
 
 # Initialize pygame
 pygame.init()
@@ -42,37 +52,31 @@ class Cluster:
         self.edges = []
         self.color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
         self.cache = {}
+        self.hierarchy = None  # HierarchyFile the cluster was loaded from
 
 # DHPA* algorithm components
-def create_clusters(map_data, cluster_size, walls):
+def create_clusters(map_data, cluster_size, walls, origin=(0, 0)):
     clusters = []
     map_width = len(map_data[0])
     map_height = len(map_data)
-    visited = set()
-    
-    def bfs(start):
-        queue = deque([start])
-        cluster_cells = []
-        while queue:
-            x, y = queue.popleft()
-            if (x, y) in visited or (x, y) in walls or x < 0 or x >= map_width or y < 0 or y >= map_height:
-                continue
-            visited.add((x, y))
-            cluster_cells.append((x, y))
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor not in visited and neighbor not in walls:
-                    queue.append(neighbor)
-        return cluster_cells
-
-    for y in range(map_height):
-        for x in range(map_width):
-            if (x, y) not in visited and (x, y) not in walls:
-                cells = bfs((x, y))
-                if cells:
-                    cluster = Cluster(cells, (x // cluster_size, y // cluster_size))
-                    clusters.append(cluster)
-    
+    ox, oy = origin
+    local_walls = {(x - ox, y - oy) for x, y in walls}
+    labels = label_components(passable_grid(map_width, map_height, local_walls, {}))
+
+    # Group cells by component label; labels are row-major first cells, so
+    # sorting them keeps the original discovery order of the clusters
+    ys, xs = np.nonzero(labels >= 0)
+    cell_labels = labels[ys, xs]
+    xs, ys = xs + ox, ys + oy
+    order = np.argsort(cell_labels, kind="stable")
+    ys, xs, cell_labels = ys[order], xs[order], cell_labels[order]
+    _, starts = np.unique(cell_labels, return_index=True)
+    for begin, end in zip(starts, list(starts[1:]) + [len(cell_labels)]):
+        cells = list(zip(xs[begin:end].tolist(), ys[begin:end].tolist()))
+        x, y = cells[0]
+        cluster = Cluster(cells, (x // cluster_size, y // cluster_size))
+        clusters.append(cluster)
+
     return clusters
 
 def connect_clusters(clusters):
@@ -90,17 +94,15 @@ def precompute_paths(clusters, walls):
             cache_paths = dijkstra(node, cluster.cells, walls)
             cluster.cache[node] = cache_paths
 
-def dijkstra(start, nodes, walls):
+def dijkstra(start, nodes, walls, open_list=BucketQueue):
     distances = {node: float('inf') for node in nodes}
     distances[start] = 0
-    priority_queue = [(0, start)]
+    priority_queue = open_list()
+    priority_queue.push(start, 0, 0)
     came_from = {}
 
     while priority_queue:
-        current_distance, current_node = heapq.heappop(priority_queue)
-
-        if current_distance > distances[current_node]:
-            continue
+        current_distance, current_node = priority_queue.pop()
 
         for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
             neighbor = (current_node[0] + dx, current_node[1] + dy)
@@ -109,22 +111,59 @@ def dijkstra(start, nodes, walls):
                 if distance < distances[neighbor]:
                     distances[neighbor] = distance
                     came_from[neighbor] = current_node
-                    heapq.heappush(priority_queue, (distance, neighbor))
+                    priority_queue.push(neighbor, distance, distance)
 
     return distances, came_from
 
+# Load the cluster hierarchy from the on-disk cache, building and caching it
+# first if needed, so clusters normally come with the file's label grid.
+# cache_dir=None skips the cache; if the cache cannot be written the
+# clusters built in memory are used.
+def build_hierarchy(map_data, cluster_size, walls, origin=(0, 0), cache_dir=CACHE_DIR):
+    if cache_dir is not None:
+        key = map_key(map_data, walls, cluster_size, origin)
+        path = cache_path(key, cache_dir)
+        hierarchy = load_hierarchy(path, key)
+        if hierarchy is not None:
+            return load_clusters(hierarchy)
+
+    clusters = create_clusters(map_data, cluster_size, walls, origin)
+    connect_clusters(clusters)
+    precompute_paths(clusters, walls)
+    if cache_dir is None:
+        return clusters
+    try:
+        save_hierarchy(path, key, hierarchy_arrays(clusters, len(map_data[0]), len(map_data), origin), origin)
+    except OSError as error:
+        print(f"Not caching the cluster hierarchy: {error}")
+        return clusters
+    hierarchy = load_hierarchy(path, key)
+    return load_clusters(hierarchy) if hierarchy is not None else clusters
+
+def load_clusters(hierarchy):
+    clusters = []
+    for index in range(hierarchy.cluster_count()):
+        cells = hierarchy.cluster_cells(index)
+        cluster = Cluster(cells, hierarchy.position(index))
+        cluster.cache = LazyClusterCache(hierarchy, index, cells)
+        cluster.hierarchy = hierarchy
+        clusters.append(cluster)
+    for index, cluster in enumerate(clusters):
+        cluster.edges = [clusters[j] for j in hierarchy.neighbors(index)]
+    return clusters
+
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def abstract_pathfinding(start_cluster, end_cluster):
-    open_set = []
-    heapq.heappush(open_set, (0, start_cluster))
+def abstract_pathfinding(start_cluster, end_cluster, open_list=BucketQueue):
+    open_set = open_list()
+    open_set.push(start_cluster, heuristic(start_cluster.position, end_cluster.position), 0)
     came_from = {}
     g_score = {start_cluster: 0}
     f_score = {start_cluster: heuristic(start_cluster.position, end_cluster.position)}
 
     while open_set:
-        _, current_cluster = heapq.heappop(open_set)
+        _, current_cluster = open_set.pop()
 
         if current_cluster == end_cluster:
             path = []
@@ -140,14 +179,14 @@ def abstract_pathfinding(start_cluster, end_cluster):
                 came_from[neighbor] = current_cluster
                 g_score[neighbor] = tentative_g_score
                 f_score[neighbor] = tentative_g_score + heuristic(neighbor.position, end_cluster.position)
-                heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                open_set.push(neighbor, f_score[neighbor], tentative_g_score)
     return []
 
-def detailed_pathfinding(start, end, clusters, walls, doors):
+def detailed_pathfinding(start, end, clusters, walls, doors, estimate=heuristic):
     start_cluster = find_cluster(start, clusters)
     end_cluster = find_cluster(end, clusters)
     if start_cluster == end_cluster:
-        return a_star(start, end, walls, doors)
+        return a_star(start, end, walls, doors, estimate=estimate)
 
     abstract_path = abstract_pathfinding(start_cluster, end_cluster)
     if not abstract_path:
@@ -158,7 +197,7 @@ def detailed_pathfinding(start, end, clusters, walls, doors):
     for cluster in abstract_path:
         if current_position == end:
             break
-        path_segment = a_star(current_position, end, walls, doors)
+        path_segment = a_star(current_position, end, walls, doors, estimate=estimate)
         if not path_segment:
             return []
         path.extend(path_segment)
@@ -166,56 +205,49 @@ def detailed_pathfinding(start, end, clusters, walls, doors):
     return path
 
 def find_cluster(pos, clusters):
+    # Clusters loaded from the cache look the cell up in the label grid
+    if clusters and clusters[0].hierarchy is not None:
+        index = clusters[0].hierarchy.cluster_at(pos)
+        return clusters[index] if index >= 0 else None
     for cluster in clusters:
         if pos in cluster.cells:
             return cluster
     return None
 
-def find_shortest_path(start, end, key_pos, doors, walls, clusters):
-    # Direct path
-    direct_path = detailed_pathfinding(start, end, clusters, walls, doors)
-    
-    # Path via key
-    path_to_key = detailed_pathfinding(start, key_pos, clusters, walls, doors)
-    if path_to_key:
-        # Temporarily open doors
-        doors_opened = []
-        for door_pos in doors:
-            if not doors[door_pos]:
-                doors[door_pos] = True
-                walls.discard(door_pos)
-                doors_opened.append(door_pos)
-
-        path_from_key_to_end = detailed_pathfinding(key_pos, end, clusters, walls, doors)
-
-        # Close the doors again
-        for door_pos in doors_opened:
-            doors[door_pos] = False
-            walls.add(door_pos)
-
-        if path_from_key_to_end:
-            path_via_key = path_to_key + path_from_key_to_end
-        else:
-            path_via_key = []
-    else:
-        path_via_key = []
+# Pick the key order on the small key/door graph, then expand each leg on the grid.
+# Cells in avoid (e.g. where a blocking agent stands) are walls on the first leg.
+def find_shortest_path(start, end, keys, planner, clusters, landmarks=None, avoid=()):
+    legs = planner.plan_legs(start, end, keys)
+    if legs is None:
+        return []
 
-    # Choose the shorter path
-    if path_via_key and (not direct_path or len(path_via_key) < len(direct_path)):
-        return path_via_key
-    else:
-        return direct_path
+    path = []
+    for source, target, mask in legs:
+        doors = planner.door_state(mask)
+        walls = planner.walls.difference(pos for pos, is_open in doors.items() if is_open)
+        if not path and avoid:
+            walls = walls | set(avoid)
+        # The landmark table matches the current doors; legs that assume
+        # extra opened doors fall back to Manhattan distance to stay admissible
+        estimate = heuristic
+        if landmarks is not None and planner.closed_doors(mask) == planner.closed_doors(0):
+            estimate = landmarks.heuristic
+        path_segment = detailed_pathfinding(source, target, clusters, walls, doors, estimate)
+        if not path_segment:
+            return []
+        path.extend(path_segment)
+    return path
 
 # A* algorithm implementation
-def a_star(start, end, walls, doors):
-    open_set = []
-    heapq.heappush(open_set, (0, start))
+def a_star(start, end, walls, doors, open_list=BucketQueue, estimate=heuristic):
+    open_set = open_list()
+    open_set.push(start, estimate(start, end), 0)
     came_from = {}
     g_score = {start: 0}
-    f_score = {start: heuristic(start, end)}
+    f_score = {start: estimate(start, end)}
 
     while open_set:
-        _, current = heapq.heappop(open_set)
+        _, current = open_set.pop()
 
         if current == end:
             path = []
@@ -234,31 +266,80 @@ def a_star(start, end, walls, doors):
             if next_pos not in g_score or tentative_g_score < g_score[next_pos]:
                 came_from[next_pos] = current
                 g_score[next_pos] = tentative_g_score
-                f_score[next_pos] = tentative_g_score + heuristic(next_pos, end)
-                heapq.heappush(open_set, (f_score[next_pos], next_pos))
+                f_score[next_pos] = tentative_g_score + estimate(next_pos, end)
+                open_set.push(next_pos, f_score[next_pos], tentative_g_score)
     return []
 
 # Central planner class definition
 class CentralPlanner:
-    def __init__(self, clusters, walls, doors):
+    def __init__(self, clusters, walls, doors, world=None, shard=None, recorder=None):
         self.clusters = clusters
         self.walls = walls
         self.doors = doors
         self.agents = []
+        self.world = world
+        self.shard = shard
+        self.recorder = recorder
+        # A shard's planner only covers the shard's own cells
+        if shard is not None:
+            self.origin, self.width, self.height = shard.origin, shard.width, shard.height
+        else:
+            self.origin, self.width, self.height = (0, 0), 40, 20
+        self.key_door_planner = KeyDoorPlanner(self.width, self.height, walls, doors, origin=self.origin)
+        # Landmarks go in the components the shard's agents start in
+        ox, oy = self.origin
+        starts = [(x - ox, y - oy) for x, y in shard.starts] if shard is not None else None
+        self.landmarks = LandmarkTable(self.grid(), 4, origin=self.origin, starts=starts)
+
+    # Passability of the planner's cells, indexed from its origin
+    def grid(self):
+        ox, oy = self.origin
+        walls = {(x - ox, y - oy) for x, y in self.walls}
+        doors = {(x - ox, y - oy): is_open for (x, y), is_open in self.doors.items()}
+        return passable_grid(self.width, self.height, walls, doors)
 
     def update_walls(self, walls):
-        self.walls = walls
+        self.update_map(walls, self.doors)
 
     def update_doors(self, doors):
+        self.update_map(self.walls, doors)
+
+    # Rebuild the key/door distances and landmarks once for a map change
+    def update_map(self, walls, doors):
+        self.walls = walls
         self.doors = doors
+        self.key_door_planner.update(self.walls, self.doors)
+        self.landmarks.update(self.grid())
 
     def register_agent(self, agent):
         self.agents.append(agent)
 
-    def plan_paths(self, key_pos):
-        for agent in self.agents:
-            agent.path = find_shortest_path((agent.rect.x // 18, agent.rect.y // 18), agent.end_pos, key_pos, self.doors, self.walls, self.clusters)
-            print(f"Agent {agent.color} path: {agent.path}")
+    def release_agent(self, agent):
+        self.agents.remove(agent)
+
+    def plan_paths(self, keys, agents=None):
+        for agent in self.agents if agents is None else agents:
+            start = (agent.rect.x // 18, agent.rect.y // 18)
+            if self.shard is not None and not self.shard.contains(agent.end_pos):
+                # The goal lies in another shard: route through the border portals
+                agent.path = self.world.plan(start, agent.end_pos)
+            else:
+                agent.path = find_shortest_path(start, agent.end_pos, keys, self.key_door_planner, self.clusters, self.landmarks)
+            if self.recorder is not None:
+                self.recorder.record_plan(agent, agent.path)
+
+    # Plan held agents around the cell they were blocked from entering.
+    # An agent without such a detour keeps its path and waits.
+    def plan_around(self, keys, blocked):
+        for agent, cell in blocked.items():
+            start = (agent.rect.x // 18, agent.rect.y // 18)
+            if self.shard is not None and not self.shard.contains(agent.end_pos):
+                continue
+            path = find_shortest_path(start, agent.end_pos, keys, self.key_door_planner, self.clusters, self.landmarks, [cell])
+            if path:
+                agent.path = path
+                if self.recorder is not None:
+                    self.recorder.record_plan(agent, agent.path)
 
 # Define the level
 level = [
@@ -285,98 +366,37 @@ level = [
     "WWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWW"
 ]
 
-# Create walls, doors and find start and end positions
-walls = set()
-doors = {}
-start_pos_yellow = None
-start_pos_blue = None
-end_pos = None
-key_pos = None
-x = y = 0
-for row in level:
-    for col in row:
-        if x // 18 >= 20:
-            break
-        if col == "W":
-            walls.add((x // 18, y // 18))
-        elif col == "P":
-            if not start_pos_yellow:
-                start_pos_yellow = (x // 18, y // 18)
-            else:
-                start_pos_blue = (x // 18, y // 18)
-        elif col == "E":
-            end_pos = (x // 18, y // 18)
-        elif col == "D":
-            key_pos = (x // 18, y // 18)
-        elif col == "V":
-            doors[(x // 18, y // 18)] = False
-        x += 18
-    y += 18
-    x = 0
-
-walls2 = set()
-doors2 = {}
-start_pos_yellow2 = None
-start_pos_blue2 = None
-end_pos2 = None
-key_pos2 = None
-x = y = 0
-for row in level:
-    for col in row[20:]:
-        if x // 18 >= 20:
-            break
-        if col == "W":
-            walls2.add((x // 18 + 20, y // 18)) 
-        elif col == "P":
-            if not start_pos_yellow2:
-                start_pos_yellow2 = (x // 18 + 20, y // 18) 
-            else:
-                start_pos_blue2 = (x // 18 + 20, y // 18) 
-        elif col == "E":
-            end_pos2 = (x // 18 + 20, y // 18) 
-        elif col == "D":
-            key_pos2 = (x // 18 + 20, y // 18)
-        elif col == "V":
-            doors2[(x // 18 + 20, y // 18)] = False
-        x += 18
-    y += 18
-    x = 0
-
-# Set initial positions for yellow and blue squares
-yellow_player1 = Player((255, 200, 0), (start_pos_yellow[0] * 18, start_pos_yellow[1] * 18))
-blue_player1 = Player((0, 0, 255), (start_pos_blue[0] * 18, start_pos_blue[1] * 18))
-yellow_player2 = Player((255, 200, 0), (start_pos_yellow2[0] * 18, start_pos_yellow2[1] * 18))
-blue_player2 = Player((0, 0, 255), (start_pos_blue2[0] * 18, start_pos_blue2[1] * 18))
-
-# Initialize central planners
-clusters_map1 = create_clusters(level, 4, walls)
-clusters_map2 = create_clusters(level, 4, walls2)
-
-connect_clusters(clusters_map1)
-connect_clusters(clusters_map2)
-
-precompute_paths(clusters_map1, walls)
-precompute_paths(clusters_map2, walls2)
-
-central_planner1 = CentralPlanner(clusters_map1, walls, doors)
-central_planner2 = CentralPlanner(clusters_map2, walls2, doors2)
-
-agents_map1 = [yellow_player1, blue_player1]
-agents_map2 = [yellow_player2, blue_player2]
-
-for agent in agents_map1:
-    agent.start_pos = (agent.rect.x // 18, agent.rect.y // 18)
-    agent.end_pos = end_pos
-    central_planner1.register_agent(agent)
-
-for agent in agents_map2:
-    agent.start_pos = (agent.rect.x // 18, agent.rect.y // 18)
-    agent.end_pos = end_pos2
-    central_planner2.register_agent(agent)
+# Split the level into two shards (left and right half), each with its own
+# walls, doors, start, end and key positions
+world = ShardedWorld(level, 2, 1)
+world.precompute()
+
+# Record positions, plans and door events for replay.py
+recorder = TrajectoryRecorder("hierarchical.trj", level)
+
+# Initialize one central planner per shard
+planners = []
+for shard in world.shards:
+    clusters = build_hierarchy(shard.rows, 4, shard.walls, shard.origin)
+    planners.append(CentralPlanner(clusters, shard.walls | shard.fence(), shard.doors, world, shard, recorder))
+
+# Set initial positions for yellow and blue squares in every shard
+agents = []
+for shard, planner in zip(world.shards, planners):
+    # Send every agent to its nearest exit; exits hold any number of agents.
+    # Doors count as open here, so an exit behind a door is still a choice.
+    exits = [shard.local(pos) for pos in shard.exits]
+    goals = assign_goals(shard.grid(open_doors=True), [shard.local(pos) for pos in shard.starts], exits)
+    goals = [shard.exits[exits.index(goal)] if goal is not None else None for goal in goals]
+    for color, start_pos, goal in zip([(255, 200, 0), (0, 0, 255)], shard.starts, goals):
+        agent = Player(color, (start_pos[0] * 18, start_pos[1] * 18))
+        agent.end_pos = goal if goal is not None else shard.exits[0]
+        planner.register_agent(agent)
+        agents.append(agent)
 
 # Central planners plan paths for all agents
-central_planner1.plan_paths(key_pos)
-central_planner2.plan_paths(key_pos2)
+for shard, planner in zip(world.shards, planners):
+    planner.plan_paths(shard.keys)
 
 # Drawing functions
 def draw_path(path, color):
@@ -385,28 +405,52 @@ def draw_path(path, color):
 
 def render_game():
     screen.fill((0, 0, 0))
-    for wall in walls.union(walls2):
-        pygame.draw.rect(screen, (0, 128, 64), pygame.Rect(wall[0] * 18, wall[1] * 18, 16, 16))
-    for door_pos, is_open in {**doors, **doors2}.items():
-        if not is_open:
-            pygame.draw.rect(screen, (128, 0, 0), pygame.Rect(door_pos[0] * 18, door_pos[1] * 18, 16, 16))
-    for pos in [end_pos, end_pos2]:
-        pygame.draw.rect(screen, (255, 0, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))
-    for pos in [key_pos, key_pos2]:
-        pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))  # Drawing the key as green
-    for agent in agents_map1 + agents_map2:
+    for shard in world.shards:
+        for wall in shard.walls:
+            pygame.draw.rect(screen, (0, 128, 64), pygame.Rect(wall[0] * 18, wall[1] * 18, 16, 16))
+        for door_pos, is_open in shard.doors.items():
+            if not is_open:
+                pygame.draw.rect(screen, (128, 0, 0), pygame.Rect(door_pos[0] * 18, door_pos[1] * 18, 16, 16))
+        for pos in shard.exits:
+            pygame.draw.rect(screen, (255, 0, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))
+        for pos in shard.keys:
+            pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))  # Drawing the key as green
+    for agent in agents:
         pygame.draw.rect(screen, agent.color, agent.rect)
         draw_path(agent.path, agent.color)
     # Draw clusters
-    for cluster in clusters_map1 + clusters_map2:
-        for cell in cluster.cells:
-            pygame.draw.rect(screen, cluster.color, pygame.Rect(cell[0] * 18, cell[1] * 18, 16, 16), 1)
+    for planner in planners:
+        for cluster in planner.clusters:
+            for cell in cluster.cells:
+                pygame.draw.rect(screen, cluster.color, pygame.Rect(cell[0] * 18, cell[1] * 18, 16, 16), 1)
     pygame.display.flip()
 
+# Lifelong mode (--lifelong): after reaching their exits agents keep
+# serving goals that stream in at random free cells of their shard
+LIFELONG = "--lifelong" in sys.argv
+
+task_streams = []
+if LIFELONG:
+    for shard, planner in zip(world.shards, planners):
+        passable = shard.grid()
+        replan = lambda assigned, planner=planner, shard=shard: planner.plan_paths(shard.keys, assigned)
+        goals = random_goals(passable, 0.1, shard.index, shard.starts, shard.origin)
+        task_streams.append(TaskStream(passable, goals, replan, origin=shard.origin))
+
+# Replan agents that had to wait because of a conflict around the cell
+# they could not enter
+def replan_agents(blocked):
+    for shard, planner in zip(world.shards, planners):
+        owned = {agent: cell for agent, cell in blocked.items() if agent in planner.agents}
+        if owned:
+            planner.plan_around(shard.keys, owned)
+
+# Agents may share the exits; every other cell holds one agent per tick
+conflict_monitor = ConflictMonitor(REPLAN, [pos for shard in world.shards for pos in shard.exits], replan_agents)
+
 # Main loop
 running = True
-door_opened_map1 = False
-door_opened_map2 = False
+opened_shards = set()
 
 while running:
     clock.tick(5)
@@ -415,37 +459,65 @@ while running:
         if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
             running = False
 
-    for agent in agents_map1 + agents_map2:
+    for agent in agents:
         pos = (agent.rect.x // 18, agent.rect.y // 18)
+        shard = world.shard_at(pos)
+        planner = planners[shard.index]
+
+        # Check for key positions and open the shard's doors if not already opened
+        if pos in shard.keys and shard.index not in opened_shards:
+            for door_pos in shard.doors:
+                shard.doors[door_pos] = True
+                shard.walls.discard(door_pos)
+                planner.walls.discard(door_pos)
+                recorder.record_door(door_pos, True)
+            planner.update_map(planner.walls, shard.doors)
+            world.refresh(shard)
+            if LIFELONG:
+                task_streams[shard.index].update(shard.grid())
+            for other in planner.agents:
+                other.start_pos = (other.rect.x // 18, other.rect.y // 18)
+            planner.plan_paths(shard.keys)
+            opened_shards.add(shard.index)
+
+    # Check everyone's next step for vertex and swap conflicts before moving
+    moves = []
+    for agent in agents:
+        pos = (agent.rect.x // 18, agent.rect.y // 18)
+        moves.append((agent, pos, agent.path[0] if agent.path else pos))
+    held = conflict_monitor.resolve(moves)
+
+    # Agents meeting head-on in a corridor with no detour never get past each
+    # other, so in lifelong mode a stuck agent gives its task back and the
+    # task goes to some other agent
+    for stream in task_streams:
+        for agent, ticks in conflict_monitor.waiting.items():
+            if ticks >= 3 and agent in stream.active:
+                stream.release(agent)
+
+    for index, (agent, pos, next_pos) in enumerate(moves):
+        # Move along the path if it exists and the agent does not have to wait
+        if not agent.path or index in held:
+            continue
+        agent.path.pop(0)
+        agent.set_position(next_pos[0] * 18, next_pos[1] * 18)
+
+        # Hand the agent over to the next shard's planner when it crosses a border
+        shard = world.shard_at(pos)
+        next_shard = world.shard_at(next_pos)
+        if next_shard is not shard:
+            planners[shard.index].release_agent(agent)
+            planners[next_shard.index].register_agent(agent)
 
-        # Check for key positions and open doors if not already opened
-        if pos == key_pos and not door_opened_map1:
-            for door_pos in doors:
-                doors[door_pos] = True
-                walls.discard(door_pos)
-            central_planner1.update_doors(doors)
-            central_planner1.update_walls(walls)
-            for agent in agents_map1:
-                agent.start_pos = (agent.rect.x // 18, agent.rect.y // 18)
-            central_planner1.plan_paths(key_pos)
-            door_opened_map1 = True
-
-        if pos == key_pos2 and not door_opened_map2:
-            for door_pos in doors2:
-                doors2[door_pos] = True
-                walls2.discard(door_pos)
-            central_planner2.update_doors(doors2)
-            central_planner2.update_walls(walls2)
-            for agent in agents_map2:
-                agent.start_pos = (agent.rect.x // 18, agent.rect.y // 18)
-            central_planner2.plan_paths(key_pos2)
-            door_opened_map2 = True
-
-        # Move along the path if it exists
-        if agent.path:
-            next_pos = agent.path.pop(0)
-            agent.set_position(next_pos[0] * 18, next_pos[1] * 18)
+    # Hand out newly arrived goals to idle agents and replan only those
+    for stream, planner in zip(task_streams, planners):
+        stream.tick(planner.agents)
 
+    recorder.record_tick(agents)
     render_game()
 
+recorder.close()
+print(f"Conflict stats: {conflict_monitor.stats()}")
+for stream in task_streams:
+    print(f"Task stats: {stream.stats()}")
 pygame.quit()
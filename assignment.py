@@ -0,0 +1,151 @@
+import heapq
+import math
+
+import numpy as np
+
+from wavefront import distance_field
+
+# Cost used for agent/goal pairs with no path, kept finite so the
+# assignment arithmetic stays well defined
+UNREACHABLE_COST = 10 ** 9
+
+# Agent-to-goal cost matrix (agents x goals). Needs one distance field per
+# goal rather than one search per agent/goal pair.
+def goal_cost_matrix(passable, starts, goals):
+    cost = np.full((len(starts), len(goals)), UNREACHABLE_COST, dtype=np.int64)
+    if not len(starts):
+        return cost
+    xs = np.array([x for x, _ in starts])
+    ys = np.array([y for _, y in starts])
+    for j, goal in enumerate(goals):
+        distances = distance_field(passable, [goal])[ys, xs]
+        cost[:, j] = np.where(distances < 0, UNREACHABLE_COST, distances)
+    return cost
+
+# Minimum-cost assignment of rows to distinct columns (Hungarian algorithm,
+# shortest augmenting path form, O(rows^2 * columns)). Needs rows <= columns;
+# returns the column of every row.
+def hungarian(cost):
+    cost = np.asarray(cost, dtype=np.float64)
+    rows, columns = cost.shape
+    if rows > columns:
+        raise ValueError(f"hungarian needs rows <= columns, got {rows} x {columns}")
+    # Index 0 is a virtual column used while growing each augmenting path
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=np.intp)
+    way = np.zeros(columns + 1, dtype=np.intp)
+
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        minv = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = column
+            candidates = np.where(free, minv[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = np.full(rows, -1, dtype=np.intp)
+    for column in range(1, columns + 1):
+        if owner[column]:
+            assignment[owner[column] - 1] = column - 1
+    return assignment
+
+# Minimum-cost assignment of rows to columns where column j takes at most
+# capacities[j] rows (a transportation problem; needs sum(capacities) >= rows).
+# Rows are added one at a time along a shortest augmenting path, as in
+# successive shortest path min-cost flow. With few columns the residual graph
+# is only the columns: moving some row from column j to column k costs
+# cost[row, k] - cost[row, j], and the cheapest such row is kept on top of a
+# heap per (j, k) pair. Each row then costs O(columns^3) instead of a pass
+# over all rows, so the solve is about O(rows * columns^3) rather than the
+# O(rows^3) of the Hungarian algorithm on repeated columns.
+def transport(cost, capacities):
+    cost = np.asarray(cost).tolist()
+    rows = len(cost)
+    columns = len(capacities)
+    if rows > sum(capacities):
+        raise ValueError(f"transport needs sum(capacities) >= rows, got {sum(capacities)} < {rows}")
+    spare = list(capacities)
+    assignment = [-1] * rows
+    heaps = [[[] for _ in range(columns)] for _ in range(columns)]
+
+    def place(row, column):
+        assignment[row] = column
+        costs = cost[row]
+        for k in range(columns):
+            if k != column:
+                heapq.heappush(heaps[column][k], (costs[k] - costs[column], row))
+
+    def cheapest(j, k):
+        heap = heaps[j][k]
+        while heap and assignment[heap[0][1]] != j:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    for row in range(rows):
+        # Bellman-Ford over the columns; there are no negative cycles while
+        # the rows placed so far are optimal
+        distance = list(cost[row])
+        previous = [-1] * columns
+        moves = [[cheapest(j, k) if j != k else None for k in range(columns)] for j in range(columns)]
+        for _ in range(columns - 1):
+            changed = False
+            for j in range(columns):
+                for k in range(columns):
+                    move = moves[j][k]
+                    if move is not None and distance[j] + move[0] < distance[k]:
+                        distance[k] = distance[j] + move[0]
+                        previous[k] = j
+                        changed = True
+            if not changed:
+                break
+        target = min((k for k in range(columns) if spare[k]), key=distance.__getitem__)
+        spare[target] -= 1
+        # Walk back along the path, shifting one row per step
+        k = target
+        while previous[k] >= 0:
+            j = previous[k]
+            place(moves[j][k][1], k)
+            k = j
+        place(row, k)
+    return np.array(assignment, dtype=np.intp)
+
+# Assign every start to a goal, minimising the total distance. Without a
+# capacity goals are shared freely and every start takes its nearest goal;
+# with one, no goal takes more than capacity agents (raised to
+# ceil(agents / goals) if needed, so everyone fits), which spreads the fleet
+# over the goals. Returns the chosen goal per start, or None for a start
+# that cannot reach any goal.
+def assign_goals(passable, starts, goals, capacity=None):
+    if not starts:
+        return []
+    if not goals:
+        return [None] * len(starts)
+
+    cost = goal_cost_matrix(passable, starts, goals)
+    if capacity is None:
+        columns = cost.argmin(axis=1)
+    else:
+        capacity = max(capacity, math.ceil(len(starts) / len(goals)))
+        columns = transport(cost, [capacity] * len(goals))
+    return [goals[goal] if cost[i, goal] < UNREACHABLE_COST else None for i, goal in enumerate(columns)]
@@ -0,0 +1,115 @@
+from collections import Counter, defaultdict
+
+VERTEX = "vertex"
+SWAP = "swap"
+
+WAIT = "wait"
+REPLAN = "replan"
+
+# Per-tick conflict monitor.
+# Each tick the caller passes the planned moves as (agent, current, target)
+# triples (target == current for an agent that stands still). Occupied cells
+# and traversed edges go into hash maps, so vertex and swap conflicts are
+# found in O(agents) instead of comparing every pair of agents.
+# Cells in shared_cells (e.g. exits, where agents stack up) never conflict.
+#
+# Policies:
+#   WAIT   - agents in a conflict stay where they are this tick
+#   REPLAN - same as WAIT, then on_replan(blocked) is called with a dict of
+#            agent -> the cell it could not enter, so the caller can plan
+#            around that cell (waiting alone never clears a head-on meeting
+#            in a corridor). Only one agent of each conflict is replanned:
+#            if both sides of a swap detoured they would meet again, and
+#            agents held behind a waiting agent just queue up.
+class ConflictMonitor:
+    def __init__(self, policy=WAIT, shared_cells=(), on_replan=None):
+        self.policy = policy
+        self.shared_cells = set(shared_cells)
+        self.on_replan = on_replan
+        self.tick = 0
+        self.counts = Counter()
+        self.locations = Counter()
+        self.last_conflicts = []
+        self.waiting = {}  # agent -> consecutive ticks it has been held
+
+    # Conflicts as (kind, (first index, second index), cell or edge)
+    def check(self, moves):
+        conflicts = []
+        occupied = {}
+        traversed = {}
+        for index, (_, current, target) in enumerate(moves):
+            if target not in self.shared_cells:
+                other = occupied.setdefault(target, index)
+                if other != index:
+                    conflicts.append((VERTEX, (other, index), target))
+            if current != target:
+                other = traversed.get((target, current))
+                if other is not None:
+                    conflicts.append((SWAP, (other, index), (current, target)))
+                traversed[(current, target)] = index
+        return conflicts
+
+    # Check this tick's moves, apply the policy and return the set of move
+    # indices that have to wait
+    def resolve(self, moves):
+        self.tick += 1
+        moves = list(moves)
+        conflicts = self.check(moves)
+        self.last_conflicts = conflicts
+        for kind, _, location in conflicts:
+            self.counts[kind] += 1
+            self.locations[location if kind == VERTEX else location[1]] += 1
+
+        # A held agent stays in its cell, so agents moving into that cell
+        # have to wait too. Spread the holds with a worklist over a
+        # target cell -> movers map; every agent is held at most once.
+        movers = defaultdict(list)
+        for index, (_, current, target) in enumerate(moves):
+            if current != target and target not in self.shared_cells:
+                movers[target].append(index)
+        held = set()
+        worklist = []
+        blocked = {}
+
+        def hold(index, replan=False):
+            agent, current, target = moves[index]
+            if index not in held and current != target:
+                if replan:
+                    blocked[agent] = target
+                moves[index] = (agent, current, current)
+                held.add(index)
+                worklist.append(index)
+
+        for kind, (first, second), _ in conflicts:
+            if kind == SWAP:
+                hold(first)
+                hold(second, True)
+            elif moves[second][1] != moves[second][2]:
+                hold(second, True)
+            elif second not in held:
+                # second stands still in the cell first wants to enter
+                hold(first, True)
+
+        while worklist:
+            cell = moves[worklist.pop()][1]
+            if cell not in self.shared_cells:
+                for index in movers.get(cell, ()):
+                    hold(index)
+
+        self.counts["waits"] += len(held)
+        self.waiting = {moves[index][0]: self.waiting.get(moves[index][0], 0) + 1 for index in held}
+        if blocked and self.policy == REPLAN and self.on_replan is not None:
+            self.counts["replans"] += len(blocked)
+            self.on_replan(blocked)
+        return held
+
+    def stats(self, hotspots=5):
+        return {
+            "ticks": self.tick,
+            "vertex_conflicts": self.counts[VERTEX],
+            "swap_conflicts": self.counts[SWAP],
+            "waits": self.counts["waits"],
+            "replans": self.counts["replans"],
+            "hotspots": self.locations.most_common(hotspots),
+            "last_tick": [(kind, location) for kind, _, location in self.last_conflicts],
+        }
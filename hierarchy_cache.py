@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+# On-disk cache of the cluster hierarchy (labels, adjacency, edge costs and
+# intra-cluster distances), keyed by a hash of the map.
+#
+# File layout:
+#   MAGIC | version (uint32) | header length (uint32) | JSON header | arrays
+# The JSON header stores the map key, the map position of the label grid and,
+# for every array, its dtype, shape and byte offset. Arrays are 64-byte aligned and memory-mapped on first use,
+# so worker processes loading the same file share its pages.
+
+MAGIC = b"MAPFHIER"
+VERSION = 2
+# Default cache directory; set MAPF_HIERARCHY_CACHE to move it
+CACHE_DIR = os.environ.get("MAPF_HIERARCHY_CACHE", ".hierarchy_cache")
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sII")
+
+# Intra-cluster distances are stored as uint16 when they fit and as uint32
+# otherwise; the largest value of the dtype marks unreachable cells
+def distance_dtype(longest):
+    return np.uint16 if longest < np.iinfo(np.uint16).max else np.uint32
+
+def unreachable(dtype):
+    return np.iinfo(dtype).max
+
+def map_key(map_data, walls, cluster_size, origin=(0, 0)):
+    digest = hashlib.sha256()
+    digest.update(f"{VERSION}:{cluster_size}:{len(map_data[0])}x{len(map_data)}@{origin[0]},{origin[1]}\n".encode())
+    for row in map_data:
+        digest.update(row.encode() + b"\n")
+    for x, y in sorted(walls):
+        digest.update(struct.pack("<ii", x, y))
+    return digest.hexdigest()[:32]
+
+def cache_path(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"hierarchy-{key}.bin")
+
+# Flatten clusters (anything with cells, position, edges and a precomputed
+# cache of (distances, came_from) per cell) into arrays for save_hierarchy.
+# origin is the map position of map_data's top-left cell; labels are local.
+def hierarchy_arrays(clusters, map_width, map_height, origin=(0, 0)):
+    ox, oy = origin
+    index_of = {id(cluster): i for i, cluster in enumerate(clusters)}
+    labels = np.full((map_height, map_width), -1, dtype=np.int32)
+    cells, cell_offsets = [], [0]
+    edges, edge_offsets = [], [0]
+    distance_blocks, distance_offsets = [], [0]
+
+    for i, cluster in enumerate(clusters):
+        for x, y in cluster.cells:
+            if 0 <= x - ox < map_width and 0 <= y - oy < map_height:
+                labels[y - oy, x - ox] = i
+        cells.extend(cluster.cells)
+        cell_offsets.append(len(cells))
+        edges.extend(index_of[id(other)] for other in cluster.edges)
+        edge_offsets.append(len(edges))
+
+        block = np.full((len(cluster.cells), len(cluster.cells)), -1, dtype=np.int64)
+        for row, node in enumerate(cluster.cells):
+            distances = cluster.cache[node][0]
+            for column, other in enumerate(cluster.cells):
+                distance = distances.get(other, float("inf"))
+                if distance != float("inf"):
+                    block[row, column] = distance
+        distance_blocks.append(block.ravel())
+        distance_offsets.append(distance_offsets[-1] + block.size)
+
+    distances = np.concatenate(distance_blocks) if distance_blocks else np.zeros(0, dtype=np.int64)
+    dtype = distance_dtype(int(distances.max(initial=0)))
+    distances = np.where(distances < 0, unreachable(dtype), distances).astype(dtype)
+    return {
+        "labels": labels,
+        "positions": np.array([cluster.position for cluster in clusters], dtype=np.int32).reshape(-1, 2),
+        "cells": np.array(cells, dtype=np.int32).reshape(-1, 2),
+        "cell_offsets": np.array(cell_offsets, dtype=np.int64),
+        "edges": np.array(edges, dtype=np.int32),
+        "edge_offsets": np.array(edge_offsets, dtype=np.int64),
+        # Every abstract edge costs 1, as in abstract_pathfinding
+        "edge_costs": np.ones(len(edges), dtype=np.uint16),
+        "distances": distances,
+        "distance_offsets": np.array(distance_offsets, dtype=np.int64),
+    }
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def save_hierarchy(path, key, arrays, origin=(0, 0)):
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({"key": key, "origin": list(origin), "arrays": entries}).encode()
+    data_start = _align(_PREFIX.size + len(header))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file and rename, so concurrent readers never see a partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+            file.write(header)
+            for name, array in arrays.items():
+                file.seek(data_start + entries[name]["offset"])
+                file.write(array.tobytes())
+            file.truncate(data_start + offset)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+# Returns a HierarchyFile, or None when the file is missing, from another
+# format version or built for a different map
+def load_hierarchy(path, key):
+    try:
+        with open(path, "rb") as file:
+            magic, version, header_length = _PREFIX.unpack(file.read(_PREFIX.size))
+            if magic != MAGIC or version != VERSION:
+                return None
+            header = json.loads(file.read(header_length))
+    except (OSError, struct.error, ValueError):
+        return None
+    if header.get("key") != key:
+        return None
+    return HierarchyFile(path, header["arrays"], _align(_PREFIX.size + header_length), tuple(header["origin"]))
+
+class HierarchyFile:
+    def __init__(self, path, entries, data_start, origin=(0, 0)):
+        self.path = path
+        self.entries = entries
+        self.data_start = data_start
+        self.origin = origin
+        self.arrays = {}
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            entry = self.entries[name]
+            shape = tuple(entry["shape"])
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.zeros(shape, dtype=entry["dtype"])
+            else:
+                self.arrays[name] = np.memmap(self.path, dtype=entry["dtype"], mode="r",
+                                              offset=self.data_start + entry["offset"], shape=shape)
+        return self.arrays[name]
+
+    def cluster_count(self):
+        return len(self["positions"])
+
+    # Index of the cluster holding a map cell, or -1 for walls and cells
+    # outside the map this hierarchy was built for
+    def cluster_at(self, pos):
+        labels = self["labels"]
+        x, y = pos[0] - self.origin[0], pos[1] - self.origin[1]
+        if not (0 <= x < labels.shape[1] and 0 <= y < labels.shape[0]):
+            return -1
+        return int(labels[y, x])
+
+    def position(self, index):
+        x, y = self["positions"][index]
+        return (int(x), int(y))
+
+    def cluster_cells(self, index):
+        begin, end = self["cell_offsets"][index:index + 2]
+        return [(int(x), int(y)) for x, y in self["cells"][begin:end]]
+
+    def neighbors(self, index):
+        begin, end = self["edge_offsets"][index:index + 2]
+        return self["edges"][begin:end].tolist()
+
+    def distance_row(self, index, local):
+        size = int(self["cell_offsets"][index + 1] - self["cell_offsets"][index])
+        begin = int(self["distance_offsets"][index]) + local * size
+        return self["distances"][begin:begin + size]
+
+# Read-only stand-in for Cluster.cache backed by a HierarchyFile.
+# cache[node] gives the same (distances, came_from) pair dijkstra returns,
+# decoded from the memory-mapped distance row only when it is asked for.
+class LazyClusterCache(Mapping):
+    def __init__(self, hierarchy, index, cells):
+        self.hierarchy = hierarchy
+        self.index = index
+        self.cells = cells
+        self.local = {cell: i for i, cell in enumerate(cells)}
+
+    def __getitem__(self, node):
+        row = self.hierarchy.distance_row(self.index, self.local[node])
+        missing = unreachable(row.dtype)
+        distances = {cell: (float("inf") if d == missing else d) for cell, d in zip(self.cells, row.tolist())}
+        came_from = {}
+        for cell, distance in distances.items():
+            if distance == 0 or distance == float("inf"):
+                continue
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                neighbor = (cell[0] + dx, cell[1] + dy)
+                if distances.get(neighbor) == distance - 1:
+                    came_from[cell] = neighbor
+                    break
+        return distances, came_from
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
@@ -0,0 +1,127 @@
+import numpy as np
+
+from open_list import HeapQueue
+from wavefront import passable_grid, distance_field, descend_path
+
+# Planner for levels with several keys and door groups.
+# A key opens every door of its group (groups are small integers; door_groups
+# maps door positions to groups, and by default every door is in group 0).
+# Distances between points of interest (the start, keys and the exit) come
+# from one distance field per target and door state, cached across plans, so
+# choosing the key order is a search over the small graph of
+# (point of interest, opened groups) states. The grid is only walked again
+# to expand the legs of the chosen plan.
+# The grid covers width x height cells from origin (e.g. one shard); all
+# positions passed in and returned are map coordinates.
+class KeyDoorPlanner:
+    def __init__(self, width, height, walls, doors, door_groups=None, origin=(0, 0)):
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.door_groups = door_groups
+        self.update(walls, doors)
+
+    # Call whenever walls or doors change; drops every cached distance field
+    def update(self, walls, doors):
+        self.walls = walls
+        self.doors = doors
+        self.base = passable_grid(self.width, self.height, {self.local(pos) for pos in walls}, {})
+        self.fields = {}
+
+    def local(self, pos):
+        return (pos[0] - self.origin[0], pos[1] - self.origin[1])
+
+    def group_of(self, door_pos):
+        if self.door_groups is None:
+            return 0
+        return self.door_groups.get(door_pos, 0)
+
+    # Doors still closed when the given groups have been opened
+    def closed_doors(self, mask):
+        return frozenset(pos for pos, is_open in self.doors.items()
+                         if not is_open and not mask & (1 << self.group_of(pos)))
+
+    def door_state(self, mask):
+        closed = self.closed_doors(mask)
+        return {pos: pos not in closed for pos in self.doors}
+
+    def field(self, target, mask):
+        closed = self.closed_doors(mask)
+        key = (target, closed)
+        if key not in self.fields:
+            grid = self.base.copy()
+            for x, y in map(self.local, closed):
+                if 0 <= x < self.width and 0 <= y < self.height:
+                    grid[y, x] = False
+            x, y = self.local(target)
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                self.fields[key] = np.full(grid.shape, -1, dtype=np.int32)
+            else:
+                self.fields[key] = distance_field(grid, [(x, y)])
+        return self.fields[key]
+
+    def distance(self, source, target, mask):
+        x, y = self.local(source)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        return int(self.field(target, mask)[y, x])
+
+    # Distance matrix between points under one door state (-1 where unreachable)
+    def distance_matrix(self, points, mask=0):
+        matrix = np.full((len(points), len(points)), -1, dtype=np.int32)
+        for j, target in enumerate(points):
+            for i, source in enumerate(points):
+                matrix[i, j] = self.distance(source, target, mask)
+        return matrix
+
+    # Cheapest order of key pickups from start to end.
+    # keys is a mapping of key position -> group, or an iterable of key
+    # positions that all open group 0. Returns a list of legs
+    # (source, target, opened groups mask) or None when end cannot be reached;
+    # door_state(mask) gives the doors dict to use while walking a leg.
+    def plan_legs(self, start, end, keys):
+        if not isinstance(keys, dict):
+            keys = {pos: 0 for pos in keys}
+        targets = [(end, None)] + [(pos, group) for pos, group in keys.items() if pos is not None]
+
+        # Leg costs are whole grid distances, far too sparse for BucketQueue
+        open_set = HeapQueue()
+        open_set.push((start, 0), 0, 0)
+        g_score = {(start, 0): 0}
+        came_from = {}
+        while open_set:
+            cost, state = open_set.pop()
+            position, mask = state
+            if position == end:
+                legs = []
+                while state in came_from:
+                    previous = came_from[state]
+                    legs.append((previous[0], state[0], previous[1]))
+                    state = previous
+                legs.reverse()
+                return legs
+
+            for target, group in targets:
+                if target == position or (group is not None and mask & (1 << group)):
+                    continue
+                distance = self.distance(position, target, mask)
+                if distance < 0:
+                    continue
+                next_state = (target, mask if group is None else mask | (1 << group))
+                tentative_g_score = cost + distance
+                if tentative_g_score < g_score.get(next_state, float('inf')):
+                    g_score[next_state] = tentative_g_score
+                    came_from[next_state] = state
+                    open_set.push(next_state, tentative_g_score, tentative_g_score)
+        return None
+
+    # Full path (excluding start) following the cheapest key order
+    def plan(self, start, end, keys):
+        legs = self.plan_legs(start, end, keys)
+        if legs is None:
+            return []
+        ox, oy = self.origin
+        path = []
+        for source, target, mask in legs:
+            path.extend((x + ox, y + oy) for x, y in descend_path(self.field(target, mask), self.local(source)))
+        return path
@@ -0,0 +1,210 @@
+import time
+
+import numpy as np
+
+from open_list import BucketQueue
+from wavefront import DIRECTIONS, label_components, wavefront
+
+# Distances are stored as uint16; this value marks cells a landmark cannot reach
+UNREACHABLE = np.iinfo(np.uint16).max
+
+# Pick count landmarks by farthest-point selection: each new landmark is the
+# cell farthest from all landmarks chosen so far. Only the components holding
+# starts are covered (the largest component without starts); a landmark in a
+# component no agent can enter never tightens an estimate. Among those, cells
+# no landmark reaches yet count as farthest, so each one gets a landmark.
+def select_landmarks(passable, count, starts=None):
+    passable = np.asarray(passable, dtype=bool)
+    labels = label_components(passable)
+    if starts:
+        height, width = passable.shape
+        chosen = {labels[y, x] for x, y in starts if 0 <= x < width and 0 <= y < height}
+        chosen.discard(-1)
+    else:
+        found, sizes = np.unique(labels[passable], return_counts=True)
+        chosen = {found[np.argmax(sizes)]} if len(found) else set()
+    passable = np.isin(labels, list(chosen))
+    cells = np.argwhere(passable)
+    if count <= 0 or not len(cells):
+        return []
+    y, x = cells[0]
+    landmarks = []
+    seeds = [(int(x), int(y))]
+    for _ in range(count):
+        distances = wavefront(passable, seeds)[0].astype(np.int64)
+        distances[(distances < 0) & passable] = np.iinfo(np.int32).max
+        distances[~passable] = -1
+        y, x = np.unravel_index(np.argmax(distances), distances.shape)
+        if distances[y, x] <= 0:
+            break
+        landmarks.append((int(x), int(y)))
+        seeds = landmarks
+    return landmarks
+
+# ALT (A*, landmarks, triangle inequality) heuristic.
+# For any landmark L, |d(L, a) - d(L, b)| <= d(a, b), so the largest such
+# difference (and never less than Manhattan distance) is an admissible and
+# usually much tighter estimate in mazes.
+# passable covers the grid from origin (e.g. one shard); landmarks and starts
+# are in grid coordinates, while heuristic() takes map coordinates.
+# Distances are stored cell-major ([H, W, K]) and mirrored into nested Python
+# lists, so a heuristic call is K scalar steps instead of several NumPy calls.
+class LandmarkTable:
+    def __init__(self, passable, count=8, landmarks=None, origin=(0, 0), starts=None):
+        self.origin = origin
+        self.passable = np.asarray(passable, dtype=bool).copy()
+        self.landmarks = list(landmarks) if landmarks is not None else select_landmarks(self.passable, count, starts)
+        self.distances = np.empty(self.passable.shape + (len(self.landmarks),), dtype=np.uint16)
+        for i in range(len(self.landmarks)):
+            self._recompute(i)
+        self._refresh()
+
+    def _refresh(self):
+        self.rows = self.distances.tolist()
+        self.goal = None
+        self.goal_distances = None
+
+    def _recompute(self, i):
+        field = wavefront(self.passable, [self.landmarks[i]])[0]
+        self.distances[:, :, i] = np.where(field < 0, UNREACHABLE, np.minimum(field, UNREACHABLE - 1))
+
+    def _column(self, pos):
+        x, y = pos[0] - self.origin[0], pos[1] - self.origin[1]
+        height, width = self.passable.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        return self.rows[y][x]
+
+    def heuristic(self, a, b):
+        estimate = abs(a[0] - b[0]) + abs(a[1] - b[1])
+        # A search calls this with the same goal over and over; keep its column
+        if b != self.goal:
+            self.goal = b
+            self.goal_distances = self._column(b)
+        to_b = self.goal_distances
+        to_a = self._column(a)
+        if to_a is None or to_b is None:
+            return estimate
+        for da, db in zip(to_a, to_b):
+            if da != UNREACHABLE and db != UNREACHABLE:
+                if da - db > estimate:
+                    estimate = da - db
+                elif db - da > estimate:
+                    estimate = db - da
+        return estimate
+
+    # Bring the table in line with a new passability grid (e.g. after doors
+    # change). Opened cells only shorten distances, which is patched in place
+    # from the opened cells outwards; a landmark is recomputed from scratch
+    # only if a cell it could reach was closed.
+    def update(self, passable):
+        passable = np.asarray(passable, dtype=bool)
+        opened = np.argwhere(passable & ~self.passable)
+        closed = self.passable & ~passable
+        self.passable = passable.copy()
+
+        for i, (x, y) in enumerate(self.landmarks):
+            # Also recompute a landmark that was itself blocked until now
+            if self.distances[y, x, i] != 0 or (closed.any() and (self.distances[:, :, i][closed] != UNREACHABLE).any()):
+                self._recompute(i)
+            elif len(opened):
+                self._lower(i, opened)
+        self._refresh()
+
+    def _lower(self, i, opened):
+        height, width = self.passable.shape
+        stride = width + 2
+        infinity = np.iinfo(np.int32).max // 2
+        padded = np.zeros((height + 2, width + 2), dtype=bool)
+        padded[1:-1, 1:-1] = self.passable
+        flat_passable = padded.ravel()
+        field = np.full((height + 2, width + 2), infinity, dtype=np.int32)
+        current = self.distances[:, :, i].astype(np.int32)
+        field[1:-1, 1:-1] = np.where(current == UNREACHABLE, infinity, current)
+        flat = field.ravel()
+        offsets = np.array([dy * stride + dx for dx, dy in DIRECTIONS], dtype=np.intp)
+
+        # Seed the opened cells from their best neighbor, then relax outwards
+        seeds = (opened[:, 0] + 1) * stride + opened[:, 1] + 1
+        best = flat[seeds[:, None] + offsets].min(axis=1) + 1
+        flat[seeds] = np.minimum(flat[seeds], best)
+        frontier = seeds[flat[seeds] < infinity]
+        while frontier.size:
+            neighbors = (frontier[:, None] + offsets).ravel()
+            candidates = np.repeat(flat[frontier] + 1, offsets.size)
+            better = flat_passable[neighbors] & (candidates < flat[neighbors])
+            neighbors, candidates = neighbors[better], candidates[better]
+            np.minimum.at(flat, neighbors, candidates)
+            frontier = np.unique(neighbors)
+
+        result = field[1:-1, 1:-1]
+        self.distances[:, :, i] = np.where(result >= infinity, UNREACHABLE, np.minimum(result, UNREACHABLE - 1))
+
+# Maze with loops: a depth-first carved perfect maze with a share of its
+# remaining inner walls knocked out, so there are detours to be misled by
+def looped_maze(size, loops=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    passable = np.zeros((size, size), dtype=bool)
+    passable[1, 1] = True
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + 2 * dx, y + 2 * dy, dx, dy) for dx, dy in DIRECTIONS
+                   if 0 < x + 2 * dx < size - 1 and 0 < y + 2 * dy < size - 1 and not passable[y + 2 * dy, x + 2 * dx]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = options[rng.integers(len(options))]
+        passable[y + dy, x + dx] = passable[ny, nx] = True
+        stack.append((nx, ny))
+    inner = np.zeros_like(passable)
+    inner[1:-1, 1:-1] = ~passable[1:-1, 1:-1]
+    walls = np.argwhere(inner)
+    for y, x in walls[rng.random(len(walls)) < loops]:
+        passable[y, x] = True
+    return passable
+
+# Grid A* returning (path length, expanded cells)
+def _search(passable, start, goal, estimate):
+    height, width = passable.shape
+    open_set = BucketQueue()
+    open_set.push(start, estimate(start, goal), 0)
+    g_score = {start: 0}
+    closed = set()
+    while open_set:
+        _, current = open_set.pop()
+        if current == goal:
+            return g_score[current], len(closed)
+        closed.add(current)
+        x, y = current
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and passable[ny, nx]:
+                g = g_score[current] + 1
+                if g < g_score.get((nx, ny), g + 1):
+                    g_score[nx, ny] = g
+                    open_set.push((nx, ny), g + estimate((nx, ny), goal), g)
+    return None, len(closed)
+
+def _manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+# Manhattan vs ALT A* on random start/goal pairs in a looped maze
+def benchmark(size=101, count=8, queries=200, seed=0):
+    passable = looped_maze(size, seed=seed)
+    table = LandmarkTable(passable, count)
+    rng = np.random.default_rng(seed)
+    cells = [(int(x), int(y)) for y, x in np.argwhere(passable)]
+    pairs = [(cells[i], cells[j]) for i, j in rng.integers(len(cells), size=(queries, 2))]
+    results = {}
+    for name, estimate in (("manhattan", _manhattan), ("landmarks", table.heuristic)):
+        expanded = 0
+        started = time.perf_counter()
+        for start, goal in pairs:
+            expanded += _search(passable, start, goal, estimate)[1]
+        results[name] = ((time.perf_counter() - started) / queries, expanded / queries)
+    return results
+
+if __name__ == "__main__":
+    for name, (seconds, expanded) in benchmark().items():
+        print(f"{name}: {seconds * 1000:.2f} ms, {expanded:.0f} expansions per query")
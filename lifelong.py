@@ -0,0 +1,232 @@
+import random
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from wavefront import distance_field, descend_path, label_components
+
+CELL = 18
+
+def _cell(agent):
+    return (agent.rect.x // CELL, agent.rect.y // CELL)
+
+class Task:
+    def __init__(self, goal):
+        self.goal = goal
+        self.submitted_tick = None
+        self.assigned_tick = None
+        self.excluded = set()  # agents that gave this task back
+
+# Lifelong (streaming) task mode.
+# Goals arrive continuously, either through submit() or from a source that
+# yields an iterable of new goals every tick. Each tick finished tasks are
+# closed, queued tasks go to the nearest idle agent, and only those agents
+# are replanned. Distance fields per goal are kept in an LRU cache and shared
+# between choosing the agent and planning its path. A task no agent can
+# reach at all is rejected and counted, rather than left in the queue. A
+# released task is not handed back to the agent that released it.
+# passable covers the grid from origin (e.g. one shard); goals and agent
+# positions are map coordinates.
+class TaskStream:
+    def __init__(self, passable, source=None, plan=None, cache_size=256, position=_cell, origin=(0, 0)):
+        self.passable = passable
+        self.origin = origin
+        self.source = iter(source) if source is not None else None
+        self.plan = plan
+        self.cache_size = cache_size
+        self.position = position
+        self.fields = OrderedDict()
+        self.queue = deque()
+        self.active = {}
+        self.tick_count = 0
+        self.completed = 0
+        self.rejected = 0
+        self.task_latencies = []  # ticks from submission to completion
+        self.plan_latencies = []  # seconds spent assigning and planning per task
+        self.started = time.perf_counter()
+
+    # Call whenever walls or doors change
+    def update(self, passable):
+        self.passable = passable
+        self.fields.clear()
+
+    def submit(self, goal):
+        task = goal if isinstance(goal, Task) else Task(goal)
+        task.submitted_tick = self.tick_count
+        self.queue.append(task)
+        return task
+
+    # Put an agent's task back in the queue (e.g. when the agent is stuck).
+    # The agent is left out when the task is assigned again; otherwise it
+    # would get the task straight back on the same tick.
+    def release(self, agent):
+        task = self.active.pop(agent, None)
+        if task is not None:
+            task.excluded.add(agent)
+            self.queue.append(task)
+            agent.path = []
+        return task
+
+    def local(self, pos):
+        return (pos[0] - self.origin[0], pos[1] - self.origin[1])
+
+    # Grid cells of the agents, with a mask of those inside the grid
+    def cells(self, agents):
+        height, width = self.passable.shape
+        xs = np.array([self.local(self.position(agent))[0] for agent in agents], dtype=np.intp)
+        ys = np.array([self.local(self.position(agent))[1] for agent in agents], dtype=np.intp)
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        return np.where(inside, xs, 0), np.where(inside, ys, 0), inside
+
+    def field(self, goal):
+        if goal in self.fields:
+            self.fields.move_to_end(goal)
+        else:
+            self.fields[goal] = distance_field(self.passable, [self.local(goal)])
+            if len(self.fields) > self.cache_size:
+                self.fields.popitem(last=False)
+        return self.fields[goal]
+
+    # Advance one tick: pull new goals, close finished tasks and hand out
+    # queued ones. Returns the agents that got a new task.
+    def tick(self, agents):
+        self.tick_count += 1
+        if self.source is not None:
+            for goal in next(self.source, ()):
+                self.submit(goal)
+
+        for agent, task in list(self.active.items()):
+            if self.position(agent) == task.goal:
+                del self.active[agent]
+                self.completed += 1
+                self.task_latencies.append(self.tick_count - task.submitted_tick)
+        return self.assign(agents)
+
+    def assign(self, agents):
+        idle = [agent for agent in agents if agent not in self.active and not agent.path]
+        if not idle or not self.queue:
+            return []
+        started = time.perf_counter()
+        xs, ys, inside = self.cells(idle)
+        free = inside.copy()
+
+        assigned = []
+        waiting = deque()
+        while self.queue and free.any():
+            task = self.queue.popleft()
+            distances = self.field(task.goal)[ys, xs]
+            allowed = free
+            if task.excluded:
+                allowed = free & np.array([agent not in task.excluded for agent in idle])
+            candidates = np.where(allowed & (distances >= 0), distances, np.iinfo(np.int32).max)
+            best = int(np.argmin(candidates))
+            if candidates[best] == np.iinfo(np.int32).max:
+                if self.reachable(task.goal, [agent for agent in agents if agent not in task.excluded]):
+                    # Only busy agents can reach this goal; keep it queued
+                    waiting.append(task)
+                elif self.reachable(task.goal, agents):
+                    # Only agents that gave it back can reach it; let them retry
+                    task.excluded.clear()
+                    waiting.append(task)
+                else:
+                    self.rejected += 1
+                continue
+            free[best] = False
+            agent = idle[best]
+            task.assigned_tick = self.tick_count
+            self.active[agent] = task
+            agent.end_pos = task.goal
+            assigned.append(agent)
+        self.queue.extendleft(reversed(waiting))
+
+        if self.plan is not None:
+            self.plan(assigned)
+        else:
+            for agent in assigned:
+                ox, oy = self.origin
+                path = descend_path(self.field(agent.end_pos), self.local(self.position(agent)))
+                agent.path = [(x + ox, y + oy) for x, y in path]
+        if assigned:
+            elapsed = (time.perf_counter() - started) / len(assigned)
+            self.plan_latencies.extend([elapsed] * len(assigned))
+        return assigned
+
+    def reachable(self, goal, agents):
+        xs, ys, inside = self.cells(agents)
+        return bool((inside & (self.field(goal)[ys, xs] >= 0)).any())
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        def percentiles(values, scale=1):
+            if not values:
+                return {}
+            p50, p90, p99 = np.percentile(values, [50, 90, 99]) * scale
+            return {"p50": float(p50), "p90": float(p90), "p99": float(p99)}
+        return {
+            "ticks": self.tick_count,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queued": len(self.queue),
+            "active": len(self.active),
+            "tasks_per_second": self.completed / elapsed if elapsed > 0 else 0.0,
+            "tasks_per_tick": self.completed / self.tick_count if self.tick_count else 0.0,
+            "latency_ticks": percentiles(self.task_latencies),
+            "plan_latency_ms": percentiles(self.plan_latencies, 1000),
+        }
+
+# Goals arriving at random free cells, rate goals per tick on average.
+# With starts, only cells connected to one of the starts are used, so no
+# goal lands in a pocket the agents can never reach. passable covers the
+# grid from origin; starts and goals are map coordinates.
+def random_goals(passable, rate, seed=None, starts=None, origin=(0, 0)):
+    generator = random.Random(seed)
+    ox, oy = origin
+    mask = np.asarray(passable, dtype=bool)
+    if starts is not None:
+        labels = label_components(mask)
+        height, width = mask.shape
+        reached = [labels[y - oy, x - ox] for x, y in starts
+                   if 0 <= x - ox < width and 0 <= y - oy < height and labels[y - oy, x - ox] >= 0]
+        mask = np.isin(labels, reached)
+    cells = [(int(x) + ox, int(y) + oy) for y, x in np.argwhere(mask)]
+    credit = 0.0
+    while True:
+        credit += rate
+        count = int(credit)
+        credit -= count
+        yield [generator.choice(cells) for _ in range(count)]
+
+class _SimAgent:
+    def __init__(self, pos):
+        self.pos = pos
+        self.path = []
+        self.end_pos = None
+
+# Headless throughput benchmark: agents take one step per tick on a random
+# open map while goals stream in at roughly one per agent every 50 ticks
+def benchmark(sizes=(64, 128, 256), agent_counts=(10, 100, 1000), ticks=200, seed=0):
+    results = []
+    for size in sizes:
+        rng = np.random.default_rng(seed)
+        passable = rng.random((size, size)) > 0.2
+        cells = np.argwhere(passable)
+        for count in agent_counts:
+            picks = rng.choice(len(cells), size=count, replace=False)
+            agents = [_SimAgent((int(cells[i][1]), int(cells[i][0]))) for i in picks]
+            starts = [agent.pos for agent in agents]
+            stream = TaskStream(passable, random_goals(passable, count / 50, seed, starts),
+                                position=lambda agent: agent.pos)
+            for _ in range(ticks):
+                stream.tick(agents)
+                for agent in agents:
+                    if agent.path:
+                        agent.pos = agent.path.pop(0)
+            results.append((size, count, stream.stats()))
+    return results
+
+if __name__ == "__main__":
+    for size, count, stats in benchmark():
+        print(f"{size}x{size}, {count} agents: {stats['completed']} tasks, "
+              f"{stats['tasks_per_second']:.1f} tasks/s, "
+              f"latency ticks {stats['latency_ticks']}, plan ms {stats['plan_latency_ms']}")
@@ -0,0 +1,83 @@
+import heapq
+from itertools import count
+
+# Open lists shared by every A*/Dijkstra in the project.
+# Both queues have the same interface:
+#   push(item, priority, g)  - add or improve an item (priority is f, g is the cost so far)
+#   pop()                    - return (priority, item) with the lowest priority,
+#                              preferring the higher g on ties
+#   bool(queue) / len(queue) - number of live items
+# Pushing an item again with a new key makes its older entries stale; they are
+# skipped on pop (lazy deletion), so a search never expands the same entry twice.
+
+# Bucket (Dial) queue for small non-negative integer priorities.
+# Every edge in our grids costs 1, so f and g are always small integers.
+# Each f bucket keeps its items in per-g LIFO lists, with the g values that
+# are in use on a max-heap, so a push or pop only touches the levels that
+# actually hold items.
+class BucketQueue:
+    def __init__(self):
+        self.buckets = []  # buckets[f] -> ({g: list of items}, heap of -g), or None
+        self.cursor = 0    # lowest f that may still be non-empty
+        self.best = {}     # item -> (f, g) of its live entry
+
+    def push(self, item, priority, g=0):
+        if priority >= len(self.buckets):
+            self.buckets.extend([None] * (priority + 1 - len(self.buckets)))
+        bucket = self.buckets[priority]
+        if bucket is None:
+            bucket = self.buckets[priority] = ({}, [])
+        levels, order = bucket
+        items = levels.get(g)
+        if items is None:
+            items = levels[g] = []
+            heapq.heappush(order, -g)
+        items.append(item)
+        if priority < self.cursor:
+            self.cursor = priority
+        self.best[item] = (priority, g)
+
+    def pop(self):
+        while self.cursor < len(self.buckets):
+            bucket = self.buckets[self.cursor]
+            if bucket is not None:
+                levels, order = bucket
+                while order:
+                    g = -order[0]
+                    items = levels[g]
+                    while items:
+                        item = items.pop()
+                        if self.best.get(item) == (self.cursor, g):
+                            del self.best[item]
+                            return self.cursor, item
+                    heapq.heappop(order)
+                    del levels[g]
+                self.buckets[self.cursor] = None
+            self.cursor += 1
+        raise IndexError("pop from an empty queue")
+
+    def __len__(self):
+        return len(self.best)
+
+# Binary heap with the same interface, for non-integer or very sparse priorities
+class HeapQueue:
+    def __init__(self):
+        self.heap = []
+        self.counter = count()
+        self.best = {}
+
+    def push(self, item, priority, g=0):
+        # Negated counter makes equal keys pop last-in first-out, like BucketQueue
+        heapq.heappush(self.heap, (priority, -g, -next(self.counter), item))
+        self.best[item] = (priority, g)
+
+    def pop(self):
+        while self.heap:
+            priority, neg_g, _, item = heapq.heappop(self.heap)
+            if self.best.get(item) == (priority, -neg_g):
+                del self.best[item]
+                return priority, item
+        raise IndexError("pop from an empty queue")
+
+    def __len__(self):
+        return len(self.best)
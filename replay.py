@@ -0,0 +1,100 @@
+import sys
+import pygame
+from trajectory import read_trajectory
+
+# Replay a recorded trajectory file without re-running any planner:
+#   python replay.py <file.trj> [ticks per second]
+path = sys.argv[1]
+fps = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+# Initialize pygame
+pygame.init()
+pygame.display.set_caption(f"Replay: {path}")
+clock = pygame.time.Clock()
+
+events = read_trajectory(path)
+screen = None
+walls = set()
+doors = {}
+exits = []
+keys = []
+colors = {}
+positions = {}
+paths = {}
+
+def load_level(rows):
+    global screen
+    screen = pygame.display.set_mode((len(rows[0]) * 18, len(rows) * 18))
+    for y, row in enumerate(rows):
+        for x, col in enumerate(row):
+            if col == "W":
+                walls.add((x, y))
+            elif col == "E":
+                exits.append((x, y))
+            elif col == "D":
+                keys.append((x, y))
+            elif col == "V":
+                doors[(x, y)] = False
+
+# Drawing functions
+def draw_path(path, color):
+    for i in range(len(path) - 1):
+        pygame.draw.line(screen, color, (path[i][0] * 18 + 8, path[i][1] * 18 + 8), (path[i + 1][0] * 18 + 8, path[i + 1][1] * 18 + 8), 3)
+
+def render_game():
+    screen.fill((0, 0, 0))
+    for wall in walls:
+        pygame.draw.rect(screen, (0, 128, 64), pygame.Rect(wall[0] * 18, wall[1] * 18, 16, 16))
+    for door_pos, is_open in doors.items():
+        if not is_open:
+            pygame.draw.rect(screen, (128, 0, 0), pygame.Rect(door_pos[0] * 18, door_pos[1] * 18, 16, 16))
+    for pos in exits:
+        pygame.draw.rect(screen, (255, 0, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))
+    for pos in keys:
+        pygame.draw.rect(screen, (0, 255, 0), pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))
+    for agent_id, pos in positions.items():
+        pygame.draw.rect(screen, colors[agent_id], pygame.Rect(pos[0] * 18, pos[1] * 18, 16, 16))
+        draw_path(paths.get(agent_id, []), colors[agent_id])
+    pygame.display.flip()
+
+# Apply events up to and including the next tick
+def advance():
+    for event in events:
+        kind = event[0]
+        if kind == "level":
+            load_level(event[1])
+        elif kind == "agent":
+            _, _, agent_id, color, pos = event
+            colors[agent_id] = color
+            positions[agent_id] = pos
+        elif kind == "plan":
+            _, _, agent_id, path = event
+            paths[agent_id] = list(path)
+        elif kind == "door":
+            _, _, door_pos, is_open = event
+            doors[door_pos] = is_open
+        elif kind == "tick":
+            for agent_id, pos in event[2].items():
+                positions[agent_id] = pos
+                # Drop the part of the planned path the agent has already walked
+                path = paths.get(agent_id, [])
+                if pos in path:
+                    del path[:path.index(pos) + 1]
+            return True
+    return False
+
+# Main loop
+running = True
+while running:
+    clock.tick(fps)
+
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            running = False
+
+    if not advance():
+        running = False
+    if screen is not None:
+        render_game()
+
+pygame.quit()
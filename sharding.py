@@ -0,0 +1,261 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from open_list import HeapQueue
+from wavefront import passable_grid, distance_field, descend_path
+
+# Most distance fields a shard keeps cached, so memory per shard stays bounded
+MAX_FIELDS = 64
+
+# Border runs narrower than this get one entrance in the middle, wider ones
+# one at each end (as in HPA*)
+WIDE_ENTRANCE = 6
+
+# One rectangular tile of the level. Everything a shard stores is in global
+# (x, y) coordinates except its grid and distance fields, which only cover
+# the tile itself.
+class Shard:
+    def __init__(self, index, origin, rows):
+        self.index = index
+        self.origin = origin
+        self.rows = rows
+        self.width = len(rows[0])
+        self.height = len(rows)
+        self.walls = set()
+        self.doors = {}
+        self.starts = []
+        self.exits = []
+        self.keys = []
+        self.portals = []             # entrance cells on the border to other shards
+        self.portal_distances = None  # portal x portal distances inside the shard
+        self.fields = {}
+
+        ox, oy = origin
+        for y, row in enumerate(rows):
+            for x, col in enumerate(row):
+                pos = (x + ox, y + oy)
+                if col == "W":
+                    self.walls.add(pos)
+                elif col == "P":
+                    self.starts.append(pos)
+                elif col == "E":
+                    self.exits.append(pos)
+                elif col == "D":
+                    self.keys.append(pos)
+                elif col == "V":
+                    self.doors[pos] = False
+
+    def contains(self, pos):
+        ox, oy = self.origin
+        return ox <= pos[0] < ox + self.width and oy <= pos[1] < oy + self.height
+
+    # Cells just outside the tile; adding them to the walls keeps a
+    # global-coordinate search inside this shard
+    def fence(self):
+        ox, oy = self.origin
+        cells = set()
+        for x in range(ox - 1, ox + self.width + 1):
+            cells.add((x, oy - 1))
+            cells.add((x, oy + self.height))
+        for y in range(oy, oy + self.height):
+            cells.add((ox - 1, y))
+            cells.add((ox + self.width, y))
+        return cells
+
+    def local(self, pos):
+        return (pos[0] - self.origin[0], pos[1] - self.origin[1])
+
+    # Local passability grid; with open_doors every door counts as open
+    def grid(self, open_doors=False):
+        walls = {self.local(pos) for pos in self.walls}
+        doors = {} if open_doors else {self.local(pos): is_open for pos, is_open in self.doors.items()}
+        return passable_grid(self.width, self.height, walls, doors)
+
+    def passable(self, pos):
+        return self.contains(pos) and pos not in self.walls and self.doors.get(pos, True)
+
+    def field(self, target):
+        if target not in self.fields:
+            if len(self.fields) >= MAX_FIELDS:
+                self.fields.clear()
+            self.fields[target] = distance_field(self.grid(), [self.local(target)])
+        return self.fields[target]
+
+    # Grid distances are symmetric, so one field answers distance(a, b) and distance(b, a)
+    def distance(self, source, target):
+        x, y = self.local(source)
+        return int(self.field(target)[y, x])
+
+    def path(self, source, target):
+        ox, oy = self.origin
+        return [(x + ox, y + oy) for x, y in descend_path(self.field(target), self.local(source))]
+
+# Portal-to-portal distance matrix for one shard grid (-1 where unreachable).
+# Module level so it can run in a worker process.
+def portal_table(grid, portals):
+    table = np.full((len(portals), len(portals)), -1, dtype=np.int32)
+    if not portals:
+        return table
+    xs = np.array([x for x, _ in portals])
+    ys = np.array([y for _, y in portals])
+    for i, portal in enumerate(portals):
+        table[i] = distance_field(grid, [portal])[ys, xs]
+    return table
+
+# Level split into columns x rows shards. Paths can cross shards through
+# border portals: within a shard the portal distances come from its own
+# table, and crossing a border costs one step. Each run of open cells along
+# a shared border is merged into one or two entrances, so the tables stay
+# small; like HPA*, paths through portals are near-optimal rather than
+# exact.
+class ShardedWorld:
+    def __init__(self, level, columns, rows):
+        self.width = len(level[0])
+        self.height = len(level)
+        self.shard_width = math.ceil(self.width / columns)
+        self.shard_height = math.ceil(self.height / rows)
+        # Rounding the tile size up can leave trailing tiles empty; drop them
+        self.columns = columns = math.ceil(self.width / self.shard_width)
+        self.rows = rows = math.ceil(self.height / self.shard_height)
+        self.shards = []
+        for row in range(rows):
+            for column in range(columns):
+                x0, y0 = column * self.shard_width, row * self.shard_height
+                tile = [line[x0:x0 + self.shard_width] for line in level[y0:y0 + self.shard_height]]
+                self.shards.append(Shard(len(self.shards), (x0, y0), tile))
+        self.crossings = {}
+        self.portal_index = {}
+        self.find_portals()
+
+    def shard_at(self, pos):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        return self.shards[(y // self.shard_height) * self.columns + x // self.shard_width]
+
+    def find_portals(self):
+        self.crossings = {}
+        self.portal_index = {}
+        portals = {shard: set() for shard in self.shards}
+
+        def add(pos, other):
+            self.crossings.setdefault(pos, []).append(other)
+            self.crossings.setdefault(other, []).append(pos)
+            portals[self.shard_at(pos)].add(pos)
+            portals[self.shard_at(other)].add(other)
+
+        def close(run):
+            if len(run) < WIDE_ENTRANCE:
+                add(*run[len(run) // 2])
+            else:
+                add(*run[0])
+                add(*run[-1])
+
+        # Walk every shard's right and bottom border, so each shared border
+        # is seen once, and cut it into runs of open cell pairs. A door
+        # gets an entrance of its own, since it opens and closes separately.
+        for shard in self.shards:
+            ox, oy = shard.origin
+            right = [(ox + shard.width - 1, y) for y in range(oy, oy + shard.height)]
+            bottom = [(x, oy + shard.height - 1) for x in range(ox, ox + shard.width)]
+            for border, (dx, dy) in ((right, (1, 0)), (bottom, (0, 1))):
+                run = []
+                for pos in border:
+                    other = (pos[0] + dx, pos[1] + dy)
+                    other_shard = self.shard_at(other)
+                    if other_shard is None or other_shard is shard or pos in shard.walls or other in other_shard.walls:
+                        if run:
+                            close(run)
+                        run = []
+                    elif pos in shard.doors or other in other_shard.doors:
+                        if run:
+                            close(run)
+                        run = []
+                        add(pos, other)
+                    else:
+                        run.append((pos, other))
+                if run:
+                    close(run)
+
+        for shard in self.shards:
+            shard.portals = sorted(portals[shard], key=lambda cell: (cell[1], cell[0]))
+            for i, pos in enumerate(shard.portals):
+                self.portal_index[pos] = i
+
+    # Build every shard's portal table, in worker processes when workers > 1
+    def precompute(self, workers=1):
+        jobs = [(shard.grid(), [shard.local(pos) for pos in shard.portals]) for shard in self.shards]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                tables = list(executor.map(portal_table, *zip(*jobs)))
+        else:
+            tables = [portal_table(grid, portals) for grid, portals in jobs]
+        for shard, table in zip(self.shards, tables):
+            shard.portal_distances = table
+            shard.fields.clear()
+
+    # Call after a shard's walls or doors change
+    def refresh(self, shard):
+        shard.fields.clear()
+        shard.portal_distances = portal_table(shard.grid(), [shard.local(pos) for pos in shard.portals])
+
+    # Shortest path (excluding start) that may cross any number of shards
+    def plan(self, start, end):
+        start_shard = self.shard_at(start)
+        end_shard = self.shard_at(end)
+        if start_shard is None or end_shard is None:
+            return []
+
+        # Portal hops cost whole leg lengths, too sparse for BucketQueue
+        open_set = HeapQueue()
+        open_set.push(start, 0, 0)
+        g_score = {start: 0}
+        came_from = {}
+        while open_set:
+            cost, current = open_set.pop()
+            if current == end:
+                nodes = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    nodes.append(current)
+                nodes.reverse()
+                return self.expand(nodes)
+
+            shard = self.shard_at(current)
+            if shard.portal_distances is None:
+                self.refresh(shard)
+            steps = []
+            if shard is end_shard:
+                steps.append((end, shard.distance(current, end)))
+            if current in self.portal_index and current != start:
+                row = shard.portal_distances[self.portal_index[current]]
+                steps.extend((pos, int(distance)) for pos, distance in zip(shard.portals, row))
+            else:
+                steps.extend((pos, shard.distance(pos, current)) for pos in shard.portals)
+            if shard.passable(current):
+                for other in self.crossings.get(current, []):
+                    if self.shard_at(other).passable(other):
+                        steps.append((other, 1))
+
+            for neighbor, distance in steps:
+                if distance < 0 or neighbor == current:
+                    continue
+                tentative_g_score = cost + distance
+                if tentative_g_score < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = current
+                    open_set.push(neighbor, tentative_g_score, tentative_g_score)
+        return []
+
+    # Turn a sequence of portal hops into cells, walking each leg inside its shard
+    def expand(self, nodes):
+        path = []
+        for source, target in zip(nodes, nodes[1:]):
+            shard = self.shard_at(source)
+            if shard.contains(target):
+                path.extend(shard.path(source, target))
+            else:
+                path.append(target)
+        return path
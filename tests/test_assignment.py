@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+
+from assignment import hungarian, transport, assign_goals, goal_cost_matrix
+
+def test_hungarian_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        rows = int(rng.integers(1, 6))
+        columns = int(rng.integers(rows, 7))
+        cost = rng.integers(0, 20, size=(rows, columns))
+        assignment = hungarian(cost)
+        assert len(set(assignment.tolist())) == rows
+        best = min(sum(cost[i, j] for i, j in enumerate(choice))
+                   for choice in itertools.permutations(range(columns), rows))
+        assert sum(cost[i, j] for i, j in enumerate(assignment)) == best
+
+def test_transport_matches_brute_force():
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        columns = int(rng.integers(1, 4))
+        capacities = rng.integers(0, 4, size=columns).tolist()
+        rows = int(rng.integers(1, sum(capacities) + 1)) if sum(capacities) else 0
+        cost = rng.integers(0, 20, size=(rows, columns))
+        assignment = transport(cost, capacities).tolist()
+        assert all(assignment.count(j) <= capacities[j] for j in range(columns))
+        best = min(sum(cost[i, j] for i, j in enumerate(choice))
+                   for choice in itertools.product(range(columns), repeat=rows)
+                   if all(choice.count(j) <= capacities[j] for j in range(columns)))
+        assert sum(cost[i, j] for i, j in enumerate(assignment)) == best
+
+def test_transport_matches_hungarian_on_repeated_slots():
+    rng = np.random.default_rng(3)
+    cost = rng.integers(0, 500, size=(200, 4))
+    slots = np.repeat(np.arange(4), 50)
+    expected = cost[np.arange(200), slots[hungarian(cost[:, slots])]].sum()
+    assert cost[np.arange(200), transport(cost, [50] * 4)].sum() == expected
+
+def test_capacity_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        passable = rng.random((6, 8)) > 0.2
+        cells = [(int(x), int(y)) for y, x in np.argwhere(passable)]
+        picks = rng.choice(len(cells), size=7, replace=False)
+        starts = [cells[i] for i in picks[:5]]
+        goals = [cells[i] for i in picks[5:]]
+        cost = goal_cost_matrix(passable, starts, goals)
+        chosen = assign_goals(passable, starts, goals, capacity=3)
+        reachable = [goal for goal in chosen if goal is not None]
+        assert all(reachable.count(goal) <= 3 for goal in goals)
+        total = sum(cost[i, goals.index(goal)] for i, goal in enumerate(chosen) if goal is not None)
+        best = min(sum(cost[i, j] for i, j in enumerate(choice) if cost[i, j] < 10 ** 9)
+                   for choice in itertools.product(range(len(goals)), repeat=len(starts))
+                   if all(choice.count(j) <= 3 for j in range(len(goals))))
+        assert total == best
+
+def test_default_sends_everyone_to_the_nearest_goal():
+    # Four agents next to exit A, exit B far down the corridor
+    passable = np.ones((1, 210), dtype=bool)
+    starts = [(1, 0), (2, 0), (3, 0), (4, 0)]
+    near, far = (0, 0), (200, 0)
+    assert assign_goals(passable, starts, [near, far]) == [near] * 4
+    assert assign_goals(passable, starts, [near, far], capacity=2).count(far) == 2
+
+def test_unreachable_start_gets_none():
+    passable = np.array([[True, False, True]])
+    assert assign_goals(passable, [(0, 0), (2, 0)], [(0, 0)]) == [(0, 0), None]
@@ -0,0 +1,77 @@
+from conflicts import ConflictMonitor, REPLAN
+from wavefront import descend_path, distance_field
+import numpy as np
+
+def test_holds_spread_down_a_queue_in_one_pass():
+    # Agents in a row all step right; the last one stands still
+    count = 10000
+    moves = [(i, (i, 0), (i + 1, 0)) for i in range(count - 1)]
+    moves.append((count - 1, (count - 1, 0), (count - 1, 0)))
+    monitor = ConflictMonitor()
+    checks = []
+    check = monitor.check
+    monitor.check = lambda moves: checks.append(1) or check(moves)
+    held = monitor.resolve(moves)
+    assert len(checks) == 1
+    assert held == set(range(count - 1))
+
+def test_swap_holds_both_agents():
+    monitor = ConflictMonitor()
+    held = monitor.resolve([("a", (0, 0), (1, 0)), ("b", (1, 0), (0, 0)), ("c", (2, 0), (3, 0))])
+    assert held == {0, 1}
+    assert monitor.stats()["swap_conflicts"] == 1
+
+def test_vertex_conflict_holds_the_later_mover_and_its_followers():
+    moves = [
+        ("a", (0, 0), (1, 0)),
+        ("b", (2, 0), (1, 0)),
+        ("c", (3, 0), (2, 0)),  # follows b, which now stays put
+        ("d", (5, 0), (6, 0)),
+    ]
+    assert ConflictMonitor().resolve(moves) == {1, 2}
+
+def test_shared_cells_never_conflict():
+    monitor = ConflictMonitor(shared_cells=[(1, 0)])
+    assert monitor.resolve([("a", (0, 0), (1, 0)), ("b", (2, 0), (1, 0))]) == set()
+    assert monitor.stats()["vertex_conflicts"] == 0
+
+def test_replan_gets_one_side_of_a_swap_and_its_blocked_cell():
+    replans = []
+    monitor = ConflictMonitor(REPLAN, on_replan=replans.append)
+    held = monitor.resolve([("a", (0, 0), (1, 0)), ("b", (1, 0), (0, 0))])
+    assert held == {0, 1}
+    assert replans == [{"b": (0, 0)}]
+
+def test_replan_detours_around_a_head_on_meeting():
+    # A loop: two rows joined at both ends, agents meet head-on on the top row
+    passable = np.zeros((3, 7), dtype=bool)
+    passable[0, :] = passable[2, :] = True
+    passable[:, 0] = passable[:, 6] = True
+    agents = {"a": [(1, 0), (6, 0)], "b": [(5, 0), (0, 0)]}
+    paths = {}
+
+    def plan(name, avoid=()):
+        grid = passable.copy()
+        for x, y in avoid:
+            grid[y, x] = False
+        start, goal = agents[name]
+        paths[name] = descend_path(distance_field(grid, [goal]), start)
+
+    def replan(blocked):
+        for name in blocked:
+            plan(name, [blocked[name]])
+
+    for name in agents:
+        plan(name)
+    monitor = ConflictMonitor(REPLAN, on_replan=replan)
+    for _ in range(30):
+        names = [name for name in agents if paths[name]]
+        if not names:
+            break
+        moves = [(name, agents[name][0], paths[name][0]) for name in names]
+        held = monitor.resolve(moves)
+        for index, name in enumerate(names):
+            if index not in held and paths[name]:
+                agents[name][0] = paths[name].pop(0)
+    assert agents["a"][0] == (6, 0) and agents["b"][0] == (0, 0)
+    assert monitor.stats()["replans"] >= 1
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+
+from hierarchy_cache import hierarchy_arrays, save_hierarchy, load_hierarchy, LazyClusterCache
+
+class FakeCluster:
+    def __init__(self, cells, position, cache):
+        self.cells = cells
+        self.position = position
+        self.edges = []
+        self.cache = cache
+
+def save_and_load(tmp_path, clusters, width, height, origin=(0, 0)):
+    path = str(tmp_path / "hierarchy.bin")
+    save_hierarchy(path, "key", hierarchy_arrays(clusters, width, height, origin), origin)
+    return load_hierarchy(path, "key")
+
+def test_long_distances_survive_a_round_trip(tmp_path):
+    a, b, c = (0, 0), (1, 0), (2, 0)
+    inf = float("inf")
+    cache = {
+        a: ({a: 0, b: 70000, c: inf}, {}),
+        b: ({a: 70000, b: 0, c: inf}, {}),
+        c: ({a: inf, b: inf, c: 0}, {}),
+    }
+    hierarchy = save_and_load(tmp_path, [FakeCluster([a, b, c], (0, 0), cache)], 3, 1)
+    assert hierarchy["distances"].dtype == np.uint32
+    distances, _ = LazyClusterCache(hierarchy, 0, [a, b, c])[a]
+    assert distances == {a: 0, b: 70000, c: inf}
+
+def test_short_distances_stay_uint16(tmp_path):
+    a, b = (0, 0), (1, 0)
+    cache = {a: ({a: 0, b: 1}, {}), b: ({a: 1, b: 0}, {b: a})}
+    hierarchy = save_and_load(tmp_path, [FakeCluster([a, b], (0, 0), cache)], 2, 1)
+    assert hierarchy["distances"].dtype == np.uint16
+    assert LazyClusterCache(hierarchy, 0, [a, b])[b] == ({a: 1, b: 0}, {a: b})
+
+def test_cluster_at_uses_labels_and_origin(tmp_path):
+    first = FakeCluster([(10, 5)], (2, 1), {(10, 5): ({(10, 5): 0}, {})})
+    second = FakeCluster([(12, 5)], (3, 1), {(12, 5): ({(12, 5): 0}, {})})
+    hierarchy = save_and_load(tmp_path, [first, second], 3, 1, origin=(10, 5))
+    assert hierarchy.cluster_at((10, 5)) == 0
+    assert hierarchy.cluster_at((12, 5)) == 1
+    assert hierarchy.cluster_at((11, 5)) == -1
+    assert hierarchy.cluster_at((0, 0)) == -1
+
+def test_failed_save_raises_and_leaves_no_temporary_file(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    cluster = FakeCluster([(0, 0)], (0, 0), {(0, 0): ({(0, 0): 0}, {})})
+    with pytest.raises(OSError):
+        save_hierarchy(str(blocker / "hierarchy.bin"), "key", hierarchy_arrays([cluster], 1, 1))
+    assert [path.name for path in tmp_path.iterdir()] == ["not-a-directory"]
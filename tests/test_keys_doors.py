@@ -0,0 +1,69 @@
+from keys_doors import KeyDoorPlanner
+
+# Corridor along y = 0 with doors at x = 4 and x = 8. The keys sit in
+# dead ends below the corridor:
+#
+#   S . . . A . . . B . E
+#   # a # # # # # b # # #
+#
+# Key a opens group 0 (door A); key b, behind door A, opens group 1 (door B).
+WIDTH, HEIGHT = 11, 2
+START, END = (0, 0), (10, 0)
+DOOR_A, DOOR_B = (4, 0), (8, 0)
+KEY_A, KEY_B = (1, 1), (7, 1)
+
+def corridor():
+    walls = {(x, 1) for x in range(WIDTH)} - {KEY_A, KEY_B}
+    return walls, {DOOR_A: False, DOOR_B: False}
+
+def walk(start, path, walls, opened):
+    current = start
+    for cell in path:
+        assert abs(cell[0] - current[0]) + abs(cell[1] - current[1]) == 1
+        assert cell not in walls
+        assert cell not in (DOOR_A, DOOR_B) or cell in opened
+        current = cell
+    return current
+
+def test_two_door_groups_are_opened_in_order():
+    walls, doors = corridor()
+    planner = KeyDoorPlanner(WIDTH, HEIGHT, walls, doors, {DOOR_A: 0, DOOR_B: 1})
+    keys = {KEY_A: 0, KEY_B: 1}
+    legs = planner.plan_legs(START, END, keys)
+    assert [target for _, target, _ in legs] == [KEY_A, KEY_B, END]
+    assert [mask for _, _, mask in legs] == [0, 1, 3]
+
+    path = planner.plan(START, END, keys)
+    # 2 to key a, 8 on to key b, 4 on to the exit
+    assert len(path) == 14
+    assert walk(START, path, walls, {DOOR_A, DOOR_B}) == END
+    # Each door is only passed after its key has been picked up
+    assert path.index(KEY_A) < path.index(DOOR_A)
+    assert path.index(KEY_B) < path.index(DOOR_B)
+
+def test_no_path_without_the_key():
+    walls, doors = corridor()
+    planner = KeyDoorPlanner(WIDTH, HEIGHT, walls, doors, {DOOR_A: 0, DOOR_B: 1})
+    # Only the key for door A is on the map
+    assert planner.plan_legs(START, END, {KEY_A: 0}) is None
+    assert planner.plan(START, END, {KEY_A: 0}) == []
+    assert planner.plan_legs(START, END, {}) is None
+
+def test_opened_doors_need_no_key():
+    walls, doors = corridor()
+    doors = {DOOR_A: True, DOOR_B: True}
+    planner = KeyDoorPlanner(WIDTH, HEIGHT, walls, doors)
+    assert planner.plan_legs(START, END, [KEY_A]) == [(START, END, 0)]
+    assert len(planner.plan(START, END, [KEY_A])) == 10
+
+def test_origin_shifts_the_grid_but_not_the_positions():
+    ox, oy = 20, 5
+    shift = lambda cell: (cell[0] + ox, cell[1] + oy)
+    walls, doors = corridor()
+    planner = KeyDoorPlanner(WIDTH, HEIGHT, set(map(shift, walls)), {shift(pos): is_open for pos, is_open in doors.items()},
+                             {shift(DOOR_A): 0, shift(DOOR_B): 1}, origin=(ox, oy))
+    path = planner.plan(shift(START), shift(END), {shift(KEY_A): 0, shift(KEY_B): 1})
+    assert path == [shift(cell) for cell in KeyDoorPlanner(WIDTH, HEIGHT, walls, doors, {DOOR_A: 0, DOOR_B: 1})
+                    .plan(START, END, {KEY_A: 0, KEY_B: 1})]
+    # Cells outside the planner's grid are unreachable
+    assert planner.plan_legs(shift(START), (0, 0), {}) is None
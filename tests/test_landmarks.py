@@ -0,0 +1,35 @@
+import numpy as np
+
+from landmarks import LandmarkTable, looped_maze, select_landmarks
+from wavefront import distance_field
+
+def test_landmarks_stay_in_the_start_components():
+    passable = np.ones((5, 9), dtype=bool)
+    passable[:, 4] = False
+    assert all(x < 4 for x, _ in select_landmarks(passable, 3, starts=[(0, 0)]))
+    # Without starts the largest component wins
+    passable[:, 2] = False
+    assert all(x > 4 for x, _ in select_landmarks(passable, 3))
+
+def test_heuristic_is_admissible():
+    passable = looped_maze(31)
+    table = LandmarkTable(passable, 4, origin=(10, 5))
+    cells = [(int(x), int(y)) for y, x in np.argwhere(passable)]
+    rng = np.random.default_rng(0)
+    for goal in [cells[i] for i in rng.integers(len(cells), size=10)]:
+        distances = distance_field(passable, [goal])
+        for x, y in cells:
+            estimate = table.heuristic((x + 10, y + 5), (goal[0] + 10, goal[1] + 5))
+            assert estimate <= distances[y, x]
+
+def test_update_after_a_door_change_matches_a_full_recompute():
+    passable = looped_maze(31)
+    door = (2, 1) if passable[1, 2] else (1, 2)
+    closed = passable.copy()
+    closed[door[1], door[0]] = False
+    table = LandmarkTable(closed, 4)
+    for grid in (passable, closed, passable):
+        table.update(grid)
+        fresh = LandmarkTable(grid, landmarks=table.landmarks)
+        assert np.array_equal(table.distances, fresh.distances)
+        assert table.rows == fresh.rows
@@ -0,0 +1,88 @@
+import numpy as np
+
+from conflicts import ConflictMonitor
+from lifelong import TaskStream, random_goals
+
+class Agent:
+    def __init__(self, pos):
+        self.pos = pos
+        self.path = []
+        self.end_pos = None
+
+def pocket_grid():
+    # Open 6x6 room with a sealed pocket at (4, 4)
+    passable = np.ones((6, 6), dtype=bool)
+    passable[3, 3:6] = False
+    passable[4:6, 3] = False
+    passable[5, 4:6] = False
+    passable[4, 5] = False
+    return passable
+
+def test_random_goals_skip_cells_the_agents_cannot_reach():
+    goals = random_goals(pocket_grid(), 5, seed=0, starts=[(0, 0)])
+    sampled = {goal for _ in range(100) for goal in next(goals)}
+    assert (4, 4) not in sampled
+    assert len(sampled) > 20
+
+def test_unreachable_task_is_rejected_and_counted():
+    stream = TaskStream(pocket_grid(), position=lambda agent: agent.pos)
+    agents = [Agent((0, 0))]
+    stream.submit((4, 4))
+    stream.submit((2, 2))
+    assigned = stream.tick(agents)
+    assert assigned == agents and agents[0].end_pos == (2, 2)
+    stats = stream.stats()
+    assert stats["rejected"] == 1
+    assert stats["queued"] == 0
+
+def test_task_only_busy_agents_reach_stays_queued():
+    passable = np.ones((1, 7), dtype=bool)
+    passable[0, 3] = False
+    stream = TaskStream(passable, position=lambda agent: agent.pos)
+    busy, idle = Agent((6, 0)), Agent((0, 0))
+    busy.path = [(5, 0)]
+    stream.submit((4, 0))
+    assert stream.tick([busy, idle]) == []
+    assert stream.stats()["queued"] == 1
+    assert stream.stats()["rejected"] == 0
+
+def test_origin_maps_goals_and_paths_to_map_coordinates():
+    origin = (20, 10)
+    goals = random_goals(pocket_grid(), 5, seed=0, starts=[(20, 10)], origin=origin)
+    sampled = {goal for _ in range(50) for goal in next(goals)}
+    assert all(20 <= x < 26 and 10 <= y < 16 for x, y in sampled)
+    assert (24, 14) not in sampled
+
+    stream = TaskStream(pocket_grid(), position=lambda agent: agent.pos, origin=origin)
+    agents = [Agent((20, 10)), Agent((0, 0))]  # the second one is outside the grid
+    stream.submit((22, 12))
+    assert stream.tick(agents) == agents[:1]
+    assert agents[0].path[-1] == (22, 12) and len(agents[0].path) == 4
+
+def test_agents_meeting_head_on_in_a_corridor_trade_tasks():
+    stream = TaskStream(np.ones((1, 7), dtype=bool), position=lambda agent: agent.pos)
+    a, b = Agent((0, 0)), Agent((6, 0))
+    stream.submit((5, 0))
+    stream.tick([a])
+    stream.submit((1, 0))
+    stream.tick([a, b])
+    assert a.end_pos == (5, 0) and b.end_pos == (1, 0)
+
+    monitor = ConflictMonitor()
+    released = []
+    for _ in range(20):
+        moves = [(agent, agent.pos, agent.path[0] if agent.path else agent.pos) for agent in (a, b)]
+        held = monitor.resolve(moves)
+        for agent, ticks in monitor.waiting.items():
+            if ticks >= 3 and agent in stream.active:
+                released.append((agent, stream.release(agent)))
+        for index, (agent, _, next_pos) in enumerate(moves):
+            if agent.path and index not in held:
+                agent.path.pop(0)
+                agent.pos = next_pos
+        stream.tick([a, b])
+        # A released task never goes straight back to the agent that let it go
+        for agent, task in released:
+            assert stream.active.get(agent) is not task
+    assert released
+    assert stream.stats()["completed"] == 2
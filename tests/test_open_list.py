@@ -0,0 +1,59 @@
+import random
+import tracemalloc
+
+import pytest
+
+from open_list import BucketQueue, HeapQueue
+
+# Unit-cost Dijkstra down a corridor: every pop pushes the next cell with
+# f == g one higher, the case where nested g buckets used to go quadratic
+def corridor(queue_type, length):
+    queue = queue_type()
+    queue.push(0, 0, 0)
+    popped = 0
+    while queue:
+        priority, cell = queue.pop()
+        popped += 1
+        if cell + 1 < length:
+            queue.push(cell + 1, priority + 1, priority + 1)
+    return popped
+
+def test_bucket_queue_corridor_is_linear():
+    length = 5000
+    tracemalloc.start()
+    try:
+        assert corridor(BucketQueue, length) == length
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Nested g buckets needed ~length^2 / 2 lists here (hundreds of MB)
+    assert peak < 2 * 1024 * 1024
+
+@pytest.mark.parametrize("queue_type", [BucketQueue, HeapQueue])
+def test_pops_lowest_f_then_highest_g(queue_type):
+    queue = queue_type()
+    queue.push("a", 3, 1)
+    queue.push("b", 3, 2)
+    queue.push("a", 2, 0)  # improves a, its (3, 1) entry goes stale
+    queue.push("c", 5, 0)
+    assert len(queue) == 3
+    assert [queue.pop() for _ in range(3)] == [(2, "a"), (3, "b"), (5, "c")]
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop()
+
+def test_bucket_queue_matches_heap_queue():
+    generator = random.Random(0)
+    bucket, heap = BucketQueue(), HeapQueue()
+    keys = {}
+    for item in range(3000):
+        if bucket and generator.random() < 0.4:
+            # Items with equal (f, g) may come out in either order
+            assert keys[bucket.pop()[1]] == keys[heap.pop()[1]]
+        g = generator.randrange(50)
+        keys[item] = (g + generator.randrange(50), g)
+        bucket.push(item, *keys[item])
+        heap.push(item, *keys[item])
+    while bucket:
+        assert keys[bucket.pop()[1]] == keys[heap.pop()[1]]
+    assert not heap
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from sharding import ShardedWorld
+from wavefront import distance_field
+
+def walk(start, path, passable):
+    current = start
+    for cell in path:
+        assert abs(cell[0] - current[0]) + abs(cell[1] - current[1]) == 1
+        assert passable[cell[1], cell[0]]
+        current = cell
+    return current
+
+def test_cross_shard_plans_are_valid_and_near_optimal():
+    rng = np.random.default_rng(0)
+    generator = random.Random(0)
+    ratios = []
+    for _ in range(30):
+        height, width = (int(size) for size in rng.integers(8, 30, 2))
+        passable = rng.random((height, width)) > 0.25
+        level = ["".join(" " if passable[y, x] else "W" for x in range(width)) for y in range(height)]
+        world = ShardedWorld(level, int(rng.integers(2, 4)), int(rng.integers(1, 4)))
+        world.precompute()
+        cells = [(int(x), int(y)) for y, x in np.argwhere(passable)]
+        for _ in range(5):
+            start, end = generator.sample(cells, 2)
+            optimal = distance_field(passable, [end])[start[1], start[0]]
+            path = world.plan(start, end)
+            # Merging border runs keeps every reachable goal reachable
+            assert bool(path) == (optimal > 0)
+            if path:
+                assert walk(start, path, passable) == end
+                assert len(path) >= optimal
+                ratios.append(len(path) / optimal)
+    assert np.mean(ratios) < 1.2
+
+LEVEL = [
+    "     W      ",
+    "     W      ",
+    "     V      ",
+    "     W      ",
+    "     W      ",
+]
+
+def test_door_on_the_border_is_its_own_portal():
+    world = ShardedWorld(LEVEL, 2, 1)
+    world.precompute()
+    left, right = world.shards
+    assert left.portals == [(5, 2)]
+    assert right.portals == [(6, 2)]
+    assert world.plan((0, 0), (11, 4)) == []
+
+    left.doors[(5, 2)] = True
+    world.refresh(left)
+    path = world.plan((0, 0), (11, 4))
+    assert len(path) == 15
+    assert (5, 2) in path and (6, 2) in path
+
+def test_border_runs_become_one_or_two_entrances():
+    # A 3-cell gap in the wall column and a 7-cell open stretch below it
+    level = ["     W      "] + ["            "] * 3 + ["     W      "] + ["            "] * 7
+    world = ShardedWorld(level, 2, 1)
+    left, _ = world.shards
+    assert left.portals == [(5, 2), (5, 5), (5, 11)]
@@ -0,0 +1,45 @@
+import pytest
+
+from trajectory import TrajectoryRecorder, read_trajectory
+
+class FakeRect:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+class FakeAgent:
+    def __init__(self, cell):
+        self.rect = FakeRect(cell[0] * 18, cell[1] * 18)
+        self.color = (255, 200, 0)
+
+def test_header_is_written_on_open(tmp_path):
+    path = tmp_path / "run.trj"
+    recorder = TrajectoryRecorder(path, ["W W"])
+    try:
+        # Nothing flushed explicitly: the run could die here
+        assert list(read_trajectory(path)) == [("level", ["W W"])]
+    finally:
+        recorder.close()
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "run.trj"
+    agent = FakeAgent((1, 1))
+    with TrajectoryRecorder(path) as recorder:
+        recorder.record_plan(agent, [(2, 1), (2, 2)])
+        recorder.record_tick([agent])
+        agent.rect.x += 18
+        recorder.record_tick([agent])
+        recorder.record_door((3, 3), True)
+    assert list(read_trajectory(path)) == [
+        ("agent", 1, 0, (255, 200, 0), (1, 1)),
+        ("plan", 1, 0, [(2, 1), (2, 2)]),
+        ("tick", 2, {0: (2, 1)}),
+        ("door", 3, (3, 3), True),
+    ]
+
+@pytest.mark.parametrize("data", [b"", b"MAPF"])
+def test_short_header_is_a_format_error(tmp_path, data):
+    path = tmp_path / "run.trj"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        list(read_trajectory(path))
@@ -0,0 +1,82 @@
+from collections import deque
+
+import numpy as np
+
+from wavefront import DIRECTIONS, wavefront, distance_field, descend_path, label_components, serpentine_maze
+
+# Deque BFS from one source, the reference every result is checked against
+def bfs(passable, source):
+    height, width = passable.shape
+    distances = np.full(passable.shape, -1)
+    distances[source[1], source[0]] = 0
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and passable[ny, nx] and distances[ny, nx] < 0:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((nx, ny))
+    return distances
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(1, 30, 2)
+        passable = rng.random((height, width)) > rng.choice([0.1, 0.35])
+        cells = [(int(x), int(y)) for y, x in np.argwhere(passable)]
+        if cells:
+            yield rng, passable, cells
+
+def test_distance_field_matches_bfs():
+    for rng, passable, cells in random_grids(50):
+        source = cells[rng.integers(len(cells))]
+        assert np.array_equal(distance_field(passable, [source]), bfs(passable, source))
+
+def test_wide_and_narrow_frontiers_match_bfs():
+    # Open areas take the vectorized path, the maze the scalar one
+    for passable in (np.ones((120, 120), dtype=bool), serpentine_maze(60)):
+        assert np.array_equal(distance_field(passable, [(0, 0)]), bfs(passable, (0, 0)))
+
+def test_multi_source_labels_point_at_a_nearest_source():
+    for rng, passable, cells in random_grids(50, seed=1):
+        picks = rng.choice(len(cells), size=min(3, len(cells)), replace=False)
+        sources = [cells[i] for i in picks]
+        distances, labels = wavefront(passable, sources)
+        fields = np.stack([bfs(passable, source) for source in sources])
+        reached = fields >= 0
+        nearest = np.where(reached, fields, np.iinfo(np.int64).max).min(axis=0)
+        assert np.array_equal(distances, np.where(reached.any(axis=0), nearest, -1))
+        ys, xs = np.nonzero(labels >= 0)
+        assert np.array_equal(fields[labels[ys, xs], ys, xs], distances[ys, xs])
+        assert np.array_equal(labels >= 0, distances >= 0)
+
+def test_descend_path_is_a_shortest_path():
+    for rng, passable, cells in random_grids(30, seed=2):
+        goal = cells[rng.integers(len(cells))]
+        distances = distance_field(passable, [goal])
+        for start in cells:
+            path = descend_path(distances, start)
+            assert len(path) == max(distances[start[1], start[0]], 0)
+            current = start
+            for cell in path:
+                assert abs(cell[0] - current[0]) + abs(cell[1] - current[1]) == 1
+                assert passable[cell[1], cell[0]]
+                current = cell
+            if path:
+                assert current == goal
+
+def test_components_match_bfs():
+    for _, passable, cells in random_grids(50, seed=3):
+        labels = label_components(passable)
+        width = passable.shape[1]
+        assert (labels[~passable] == -1).all()
+        seen = set()
+        for cell in cells:
+            if cell in seen:
+                continue
+            reached = bfs(passable, cell) >= 0
+            ys, xs = np.nonzero(reached)
+            seen.update(zip(xs.tolist(), ys.tolist()))
+            # Labelled by the component's first cell in row-major order
+            assert (labels[reached] == (ys * width + xs).min()).all()
@@ -0,0 +1,228 @@
+import struct
+
+# Compact binary trajectory log: per-tick agent moves, plans and door events.
+#
+# File layout: MAGIC | version (uint16) | records. A record is a tag byte
+# followed by unsigned LEB128 varints (signed values zigzag-encoded):
+#   LEVEL  rows, then (length, bytes) per row
+#   AGENT  id, r, g, b, x, y            - first time an agent is seen
+#   TICK   tick delta, moved count, then (id, dx, dy) per moved agent
+#   PLAN   id, x, y, length, then (dx, dy) per step from the previous cell
+#   DOOR   x, y, is_open
+# Agent moves and path steps are stored as deltas, so a unit step costs two
+# bytes.
+
+MAGIC = b"MAPFTRJ"
+VERSION = 1
+CELL = 18
+
+LEVEL, AGENT, TICK, PLAN, DOOR = range(5)
+
+_HEADER = struct.Struct("<7sH")
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+def _write_varint(buffer, value):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _cell(agent):
+    return (agent.rect.x // CELL, agent.rect.y // CELL)
+
+# Buffered writer; records are built in memory and written in large chunks
+class TrajectoryRecorder:
+    def __init__(self, path, level=None, buffer_size=1 << 16):
+        self.file = open(path, "wb")
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.agent_ids = {}
+        self.positions = []
+        self.tick = 0
+        self.last_tick = 0
+        if level is not None:
+            self.buffer.append(LEVEL)
+            _write_varint(self.buffer, len(level))
+            for row in level:
+                data = row.encode()
+                _write_varint(self.buffer, len(data))
+                self.buffer.extend(data)
+        # Write the header (and level) right away, so a run that dies before
+        # close() still leaves a readable file
+        self.file.write(_HEADER.pack(MAGIC, VERSION))
+        self.flush()
+        self.file.flush()
+
+    def agent_id(self, agent):
+        key = id(agent)
+        if key not in self.agent_ids:
+            self.agent_ids[key] = len(self.positions)
+            x, y = _cell(agent)
+            self.positions.append((x, y))
+            self.buffer.append(AGENT)
+            for value in (self.agent_ids[key], *agent.color):
+                _write_varint(self.buffer, value)
+            _write_varint(self.buffer, _zigzag(x))
+            _write_varint(self.buffer, _zigzag(y))
+        return self.agent_ids[key]
+
+    def record_tick(self, agents):
+        self.tick += 1
+        moved = []
+        for agent in agents:
+            agent_id = self.agent_id(agent)
+            x, y = _cell(agent)
+            old_x, old_y = self.positions[agent_id]
+            if (x, y) != (old_x, old_y):
+                moved.append((agent_id, x - old_x, y - old_y))
+                self.positions[agent_id] = (x, y)
+        if not moved:
+            return
+        self.buffer.append(TICK)
+        _write_varint(self.buffer, self.tick - self.last_tick)
+        _write_varint(self.buffer, len(moved))
+        for agent_id, dx, dy in moved:
+            _write_varint(self.buffer, agent_id)
+            _write_varint(self.buffer, _zigzag(dx))
+            _write_varint(self.buffer, _zigzag(dy))
+        self.last_tick = self.tick
+        self._maybe_flush()
+
+    def record_plan(self, agent, path):
+        agent_id = self.agent_id(agent)
+        x, y = _cell(agent)
+        self.buffer.append(PLAN)
+        _write_varint(self.buffer, agent_id)
+        _write_varint(self.buffer, _zigzag(x))
+        _write_varint(self.buffer, _zigzag(y))
+        _write_varint(self.buffer, len(path))
+        for next_x, next_y in path:
+            _write_varint(self.buffer, _zigzag(next_x - x))
+            _write_varint(self.buffer, _zigzag(next_y - y))
+            x, y = next_x, next_y
+        self._maybe_flush()
+
+    def record_door(self, pos, is_open):
+        self.buffer.append(DOOR)
+        _write_varint(self.buffer, _zigzag(pos[0]))
+        _write_varint(self.buffer, _zigzag(pos[1]))
+        _write_varint(self.buffer, int(is_open))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Streaming reader. Yields events as tuples:
+#   ("level", rows)
+#   ("agent", tick, agent_id, color, (x, y))
+#   ("tick", tick, {agent_id: (x, y)} for the agents that moved)
+#   ("plan", tick, agent_id, path)
+#   ("door", tick, (x, y), is_open)
+# Plans and door events carry the number of the next tick with moves, which
+# is the tick they were recorded before.
+def read_trajectory(path, chunk_size=1 << 16):
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is too short to be a trajectory file")
+        magic, version = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+        reader = _ByteReader(file, chunk_size)
+        positions = []
+        tick = 1
+        while True:
+            tag = reader.byte()
+            if tag is None:
+                return
+            if tag == LEVEL:
+                rows = [reader.bytes(reader.varint()).decode() for _ in range(reader.varint())]
+                yield ("level", rows)
+            elif tag == AGENT:
+                agent_id = reader.varint()
+                color = (reader.varint(), reader.varint(), reader.varint())
+                position = (_unzigzag(reader.varint()), _unzigzag(reader.varint()))
+                positions.append(position)
+                yield ("agent", tick, agent_id, color, position)
+            elif tag == TICK:
+                tick += reader.varint() - 1
+                moved = {}
+                for _ in range(reader.varint()):
+                    agent_id = reader.varint()
+                    x, y = positions[agent_id]
+                    positions[agent_id] = (x + _unzigzag(reader.varint()), y + _unzigzag(reader.varint()))
+                    moved[agent_id] = positions[agent_id]
+                yield ("tick", tick, moved)
+                tick += 1
+            elif tag == PLAN:
+                agent_id = reader.varint()
+                x, y = _unzigzag(reader.varint()), _unzigzag(reader.varint())
+                path = []
+                for _ in range(reader.varint()):
+                    x += _unzigzag(reader.varint())
+                    y += _unzigzag(reader.varint())
+                    path.append((x, y))
+                yield ("plan", tick, agent_id, path)
+            elif tag == DOOR:
+                pos = (_unzigzag(reader.varint()), _unzigzag(reader.varint()))
+                yield ("door", tick, pos, bool(reader.varint()))
+            else:
+                raise ValueError(f"unknown record tag {tag} in {path}")
+
+class _ByteReader:
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.data = b""
+        self.offset = 0
+
+    def _fill(self, count):
+        if len(self.data) - self.offset < count:
+            self.data = self.data[self.offset:] + self.file.read(max(count, self.chunk_size))
+            self.offset = 0
+        return len(self.data) >= count
+
+    def byte(self):
+        if not self._fill(1):
+            return None
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def bytes(self, count):
+        if not self._fill(count):
+            raise ValueError("truncated trajectory file")
+        value = self.data[self.offset:self.offset + count]
+        self.offset += count
+        return value
+
+    def varint(self):
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            if byte is None:
+                raise ValueError("truncated trajectory file")
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
@@ -0,0 +1,199 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Neighbor order used everywhere in the project: down, up, right, left
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+# Build a boolean passability grid (indexed [y, x]) from walls and doors
+def passable_grid(width, height, walls, doors):
+    grid = np.ones((height, width), dtype=bool)
+    for x, y in walls:
+        if 0 <= x < width and 0 <= y < height:
+            grid[y, x] = False
+    for (x, y), is_open in doors.items():
+        if not is_open and 0 <= x < width and 0 <= y < height:
+            grid[y, x] = False
+    return grid
+
+# Pad the grid with a ring of blocked cells so neighbor offsets never leave the array
+def _pad(passable):
+    height, width = passable.shape
+    padded = np.zeros((height + 2, width + 2), dtype=bool)
+    padded[1:-1, 1:-1] = passable
+    return padded.ravel(), width + 2
+
+def _unpad(flat, stride, shape):
+    return flat.reshape(-1, stride)[1:-1, 1:-1].reshape(shape).copy()
+
+# Frontiers narrower than this are expanded one cell at a time: every NumPy
+# level costs a fixed batch of calls, which only pays off on wide frontiers
+# (open areas), while corridors in mazes are a few cells wide
+SCALAR_FRONTIER = 64
+
+# Multi-source BFS over the whole grid, expanding one frontier per step.
+# Returns (distances, labels): distances are -1 for unreachable cells and
+# labels hold the index of the nearest source (-1 where unreachable).
+def wavefront(passable, sources):
+    passable = np.asarray(passable, dtype=bool)
+    flat, stride = _pad(passable)
+    offsets = np.array([dy * stride + dx for dx, dy in DIRECTIONS], dtype=np.intp)
+
+    distances = np.full(flat.size, -1, dtype=np.int32)
+    labels = np.full(flat.size, -1, dtype=np.int32)
+    claim = np.zeros(flat.size, dtype=np.intp)
+    # Memoryviews share the arrays' memory and index at list speed
+    open_view = memoryview(flat)
+    distance_view = memoryview(distances)
+    label_view = memoryview(labels)
+    steps = offsets.tolist()
+
+    frontier = np.array([(y + 1) * stride + x + 1 for x, y in sources], dtype=np.intp)
+    source_ids = np.arange(frontier.size, dtype=np.int32)
+    keep = flat[frontier]
+    frontier, source_ids = frontier[keep], source_ids[keep]
+    # Earlier sources win when several share a cell
+    distances[frontier[::-1]] = 0
+    labels[frontier[::-1]] = source_ids[::-1]
+    frontier = np.unique(frontier)
+
+    step = 0
+    while len(frontier):
+        step += 1
+        if len(frontier) < SCALAR_FRONTIER:
+            cells = frontier.tolist() if isinstance(frontier, np.ndarray) else frontier
+            frontier = []
+            for cell in cells:
+                label = label_view[cell]
+                for offset in steps:
+                    neighbor = cell + offset
+                    if open_view[neighbor] and distance_view[neighbor] < 0:
+                        distance_view[neighbor] = step
+                        label_view[neighbor] = label
+                        frontier.append(neighbor)
+            if len(frontier) >= SCALAR_FRONTIER:
+                frontier = np.array(frontier, dtype=np.intp)
+            continue
+
+        neighbors = (frontier[:, None] + offsets).ravel()
+        parents = np.repeat(frontier, offsets.size)
+        keep = flat[neighbors] & (distances[neighbors] < 0)
+        neighbors, parents = neighbors[keep], parents[keep]
+
+        # Deduplicate without sorting: the last write to claim wins
+        order = np.arange(neighbors.size)
+        claim[neighbors] = order
+        first = claim[neighbors] == order
+        neighbors, parents = neighbors[first], parents[first]
+
+        distances[neighbors] = step
+        labels[neighbors] = labels[parents]
+        frontier = neighbors
+
+    shape = passable.shape
+    return _unpad(distances, stride, shape), _unpad(labels, stride, shape)
+
+def distance_field(passable, sources):
+    return wavefront(passable, sources)[0]
+
+# Walk down a distance field from start to its source.
+# The path excludes start and includes the source, like the BFS/A* paths.
+def descend_path(distances, start):
+    height, width = distances.shape
+    x, y = start
+    if not (0 <= x < width and 0 <= y < height) or distances[y, x] < 0:
+        return []
+    path = []
+    current = int(distances[y, x])
+    while current > 0:
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and distances[ny, nx] == current - 1:
+                x, y = nx, ny
+                break
+        current -= 1
+        path.append((x, y))
+    return path
+
+# Label 4-connected components of passable cells.
+# Each component is labelled by its first cell in row-major order, the same
+# order in which create_clusters discovers them; blocked cells get -1.
+def label_components(passable):
+    passable = np.asarray(passable, dtype=bool)
+    height, width = passable.shape
+    index = np.arange(passable.size, dtype=np.intp).reshape(passable.shape)
+
+    horizontal = passable[:, :-1] & passable[:, 1:]
+    vertical = passable[:-1, :] & passable[1:, :]
+    u = np.concatenate([index[:, :-1][horizontal], index[:-1, :][vertical]])
+    v = np.concatenate([index[:, 1:][horizontal], index[1:, :][vertical]])
+
+    # Vectorized union-find: hook roots onto the smaller root, then pointer-jump
+    parent = np.arange(passable.size, dtype=np.intp)
+    while True:
+        root_u, root_v = parent[u], parent[v]
+        pending = root_u != root_v
+        if not pending.any():
+            break
+        low = np.minimum(root_u[pending], root_v[pending])
+        np.minimum.at(parent, root_u[pending], low)
+        np.minimum.at(parent, root_v[pending], low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    labels = parent.reshape(passable.shape)
+    return np.where(passable, labels, -1)
+
+# Reference single-source BFS, one cell at a time (what the scripts used to do)
+def _deque_distances(passable, source):
+    height, width = passable.shape
+    distances = np.full(passable.shape, -1, dtype=np.int32)
+    distances[source[1], source[0]] = 0
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and passable[ny, nx] and distances[ny, nx] < 0:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((nx, ny))
+    return distances
+
+# Serpentine maze: full rows of wall with a single gap at alternating ends,
+# the worst case for a level-synchronous BFS (every level is one cell wide)
+def serpentine_maze(size):
+    passable = np.ones((size, size), dtype=bool)
+    for y in range(1, size, 2):
+        passable[y] = False
+        passable[y, size - 1 if y % 4 == 1 else 0] = True
+    return passable
+
+# Wavefront vs deque BFS on a maze and an open grid. Only open grids reach
+# the 10x target; on mazes the frontier stays narrow and the gain is small
+# (about 1.2-2x depending on the machine and the reference BFS).
+def benchmark(size=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    grids = {
+        "serpentine maze": serpentine_maze(size),
+        "random, 30% walls": rng.random((size, size)) > 0.3,
+    }
+    results = []
+    for name, passable in grids.items():
+        passable[:2, :2] = True
+        started = time.perf_counter()
+        distances = distance_field(passable, [(0, 0)])
+        vectorized = time.perf_counter() - started
+        started = time.perf_counter()
+        reference = _deque_distances(passable, (0, 0))
+        scalar = time.perf_counter() - started
+        assert np.array_equal(distances, reference)
+        results.append((name, vectorized, scalar))
+    return results
+
+if __name__ == "__main__":
+    for name, vectorized, scalar in benchmark():
+        print(f"{name}: wavefront {vectorized:.2f} s, deque BFS {scalar:.2f} s ({scalar / vectorized:.1f}x)")